@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+from airflow.providers.postgres.hooks.postgres import PostgresHook
+import sys
+
+# Pipeline scripts are mounted next to the DAGs
+sys.path.append('/opt/airflow/scripts')
+
+from micro_batch_ingestion import MicroBatchIngestor, MicroBatcher
+from run_marker import datasets_for_models, publish_run_marker
+
+# Default arguments
+default_args = {
+    'owner': 'club_analytics',
+    'depends_on_past': False,
+    'start_date': datetime(2024, 1, 1),
+    'email_on_failure': False,
+    'email_on_retry': False,
+    'retries': 1,
+    'retry_delay': timedelta(minutes=1),
+}
+
+# dbt runs share the pipeline DAG's 1-slot pool: concurrent incremental
+# builds of the same model collide with the daily or backfill dbt_run
+DBT_POOL = 'club_analytics_dbt'
+
+# DAG definition: small, frequent runs instead of one daily batch.
+# max_active_runs=1 keeps at most one micro-batch hitting the database.
+dag = DAG(
+    'club_analytics_micro_batch',
+    default_args=default_args,
+    description='Club Analytics micro-batch ingestion driven by file arrival in data/raw',
+    schedule_interval='*/5 * * * *',
+    catchup=False,
+    max_active_runs=1,
+    tags=['analytics', 'club', 'ingestion', 'micro-batch'],
+)
+
+def make_ingestor(postgres_hook):
+    """Micro-batch ingestor for the mounted raw directory (dbt runs in its own task)"""
+    return MicroBatchIngestor(
+        watch_dir='/opt/airflow/data/raw',
+        connection_string=postgres_hook.get_uri(),
+        batcher=MicroBatcher(max_batch_files=50, max_batch_bytes=256 * 1024 * 1024),
+        dbt_project_dir='/opt/airflow/dbt',
+        dbt_profiles_dir='/opt/airflow',
+        run_dbt=False,
+        metrics_db_path='/opt/airflow/data/metrics/pipeline_metrics.db'
+    )
+
+def ingest_new_files(**context):
+    """Load newly arrived raw files; return the incremental models to rebuild"""
+    postgres_hook = PostgresHook(postgres_conn_id='postgres_default')
+    
+    summary = make_ingestor(postgres_hook).run_once(flush=True)
+    if summary is None:
+        print("No new raw files")
+        return []
+    
+    if not summary['success']:
+        raise RuntimeError(f"Micro-batch failed: {summary['results']}")
+    
+    print(f"Loaded {summary['rows_loaded']} rows from {summary['files']} files, "
+          f"changed {summary['changed_models']}")
+    return summary['changed_models']
+
+def rebuild_changed_models(**context):
+    """Rebuild only the models downstream of the loaded sources"""
+    changed_models = context['ti'].xcom_pull(task_ids='ingest_new_files') or []
+    if not changed_models:
+        print("No models to rebuild")
+        return
+    
+    postgres_hook = PostgresHook(postgres_conn_id='postgres_default')
+    if not make_ingestor(postgres_hook).trigger_dbt(changed_models):
+        raise RuntimeError(f"dbt run failed for {changed_models}")
+    
+    # Let dashboards drop the cached results of the rebuilt datasets
+    datasets = datasets_for_models(changed_models, include_always=False)
+    if datasets:
+        publish_run_marker(postgres_hook.get_sqlalchemy_engine(), context['run_id'], datasets)
+
+ingest_task = PythonOperator(
+    task_id='ingest_new_files',
+    python_callable=ingest_new_files,
+    dag=dag,
+)
+
+dbt_run_task = PythonOperator(
+    task_id='dbt_run_changed_models',
+    python_callable=rebuild_changed_models,
+    pool=DBT_POOL,
+    dag=dag,
+)
+
+ingest_task >> dbt_run_task
@@ -4,8 +4,53 @@ from airflow.operators.bash import BashOperator
 from airflow.operators.python import PythonOperator
 from airflow.providers.postgres.operators.postgres import PostgresOperator
 from airflow.providers.postgres.hooks.postgres import PostgresHook
-import pandas as pd
 import os
+import sys
+
+# Pipeline scripts are mounted next to the DAGs
+sys.path.append('/opt/airflow/scripts')
+
+from dbt_selection import (
+    TRACKED_SOURCES, build_dbt_selector, changed_fingerprints, changed_sources, models_for_sources,
+    read_recorded_fingerprints, record_fingerprints, source_fingerprints
+)
+from idempotent_batch_loader import IdempotentBatchLoader
+from kpi_engine import KPIEngine, append_to_store
+from metrics_store import MetricsStore
+from pipeline_metrics import StageMetrics, load_dbt_run_results
+from quality_checks import run_scan
+from run_marker import datasets_for_models, publish_run_marker
+
+# Stage metrics sinks (local SQLite table + Prometheus textfile)
+METRICS_DB = '/opt/airflow/data/metrics/pipeline_metrics.db'
+METRICS_PROM = '/opt/airflow/data/metrics/club_pipeline.prom'
+METRICS_STORE_DIR = '/opt/airflow/data/metrics/store'
+
+def record_task_metrics(context):
+    """Record the duration and outcome of a finished task"""
+    ti = context['task_instance']
+    duration = ti.duration
+    if duration is None and ti.start_date is not None:
+        duration = (datetime.now(ti.start_date.tzinfo) - ti.start_date).total_seconds()
+    
+    metrics = StageMetrics(run_id=context['run_id'])
+    metrics.record(
+        f"dag.{ti.task_id}",
+        duration_seconds=duration or 0.0,
+        status=str(ti.state),
+        started_at=ti.start_date.isoformat() if ti.start_date else None
+    )
+    metrics.flush(METRICS_DB, METRICS_PROM)
+
+def record_dbt_metrics(context):
+    """Record the task duration plus per-model timings from dbt's run_results.json"""
+    record_task_metrics(context)
+    
+    run_results = '/opt/airflow/dbt/target/run_results.json'
+    if os.path.exists(run_results):
+        metrics = StageMetrics(run_id=context['run_id'])
+        load_dbt_run_results(run_results, metrics)
+        metrics.flush(METRICS_DB, METRICS_PROM)
 
 # Default arguments
 default_args = {
@@ -16,168 +61,236 @@ default_args = {
     'email_on_retry': False,
     'retries': 1,
     'retry_delay': timedelta(minutes=5),
+    'on_success_callback': record_task_metrics,
+    'on_failure_callback': record_task_metrics,
 }
 
+# Backfill settings: every task works on the run's data interval, so several
+# days can run side by side. Database-heavy tasks share a pool and dbt tasks
+# run one at a time (concurrent incremental builds of the same model collide).
+MAX_ACTIVE_RUNS = int(os.environ.get('CLUB_PIPELINE_MAX_ACTIVE_RUNS', '8'))
+CATCHUP = os.environ.get('CLUB_PIPELINE_CATCHUP', 'false').lower() == 'true'
+DB_POOL = 'club_analytics_db'
+DBT_POOL = 'club_analytics_dbt'
+
 # DAG definition
 dag = DAG(
     'club_analytics_pipeline',
     default_args=default_args,
     description='Club Analytics Pipeline: Data Ingestion, Transformation, and Quality Checks',
     schedule_interval='@daily',
-    catchup=False,
+    catchup=CATCHUP,
+    max_active_runs=MAX_ACTIVE_RUNS,
     tags=['analytics', 'club', 'dbt', 'data-quality'],
 )
 
+# Raw file prefix -> raw table and primary key
+RAW_FILES = {
+    'tickets': ('entrada', 'identrada'),
+    'dues': ('cuota', 'idcuota'),
+}
+
 # Task 1: Seed raw data from CSV files
-def seed_raw_data():
-    """Simulate daily CSV ingestion and load into raw tables"""
+def seed_raw_data(**context):
+    """Load the daily CSV files into raw tables and record which sources changed"""
     postgres_hook = PostgresHook(postgres_conn_id='postgres_default')
     
     # Create raw schema if it doesn't exist
-    postgres_hook.run("CREAR SCHEMA SI NO EXISTE raw;")
+    postgres_hook.run("CREATE SCHEMA IF NOT EXISTS raw;")
     
-    # Load CSV data into raw tables
-    csv_files = ['tickets', 'dues']
+    metrics = StageMetrics(run_id=context['run_id'])
+    loader = IdempotentBatchLoader(postgres_hook.get_uri(), metrics=metrics)
+    row_counts = {}
     
-    for file_type in csv_files:
-        csv_path = f'/opt/airflow/data/raw/{file_type}_{datetime.now().strftime("%Y%m%d")}.csv'
+    # Load the CSV files of this run's data interval into raw tables
+    for file_type, (table, primary_key) in RAW_FILES.items():
+        csv_path = f'/opt/airflow/data/raw/{file_type}_{context["ds_nodash"]}.csv'
         
         if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
+            result = loader.batch_load_csv(
+                csv_path, table, 'raw', primary_key,
+                staging_values={'load_date': context['ds']}
+            )
+            if not result['success']:
+                raise RuntimeError(f"Loading {csv_path} failed: {result['error']}")
             
-            if file_type == 'tickets':
-                # Load ticket data
-                df.to_sql('entrada', postgres_hook.get_conn(), 
-                         schema='raw', if_exists='append', index=False)
-            elif file_type == 'dues':
-                # Load dues data
-                df.to_sql('cuota', postgres_hook.get_conn(), 
-                         schema='raw', if_exists='append', index=False)
-            
-            print(f"Loaded {len(df)} records from {csv_path}")
+            row_counts[table] = result['rows_loaded']
+            print(f"Loaded {result['rows_loaded']} records from {csv_path}")
         else:
+            row_counts[table] = 0
             print(f"CSV file {csv_path} not found, skipping...")
+    
+    # Source freshness: rows loaded outside this task (e.g. micro-batches) since
+    # the previous successful run also count as changes (scheduled runs only;
+    # backfills reprocess exactly the files of their own day)
+    since = context.get('prev_start_date_success')
+    is_scheduled = context['dag_run'].run_type == 'scheduled'
+    for table in TRACKED_SOURCES:
+        if row_counts.get(table, 0) == 0 and since is not None and is_scheduled:
+            fresh = postgres_hook.get_first(
+                f"SELECT COUNT(*) FROM raw.{table} WHERE loaded_at >= %s", parameters=(since,)
+            )
+            row_counts[table] = fresh[0] if fresh else 0
+    
+    # Dimension sources have no loaded_at: compare their content with the
+    # fingerprints recorded by the last successful run (none yet on a fresh
+    # warehouse, so the dimensions are built before the facts joining them)
+    engine = postgres_hook.get_sqlalchemy_engine()
+    fingerprints = source_fingerprints(engine)
+    changed_dimensions = changed_fingerprints(fingerprints, read_recorded_fingerprints(engine))
+    
+    metrics.flush(METRICS_DB, METRICS_PROM)
+    
+    sources = sorted(set(changed_sources(row_counts)) | set(changed_dimensions))
+    selector = build_dbt_selector(models_for_sources(sources))
+    context['ti'].xcom_push(key='changed_sources', value=sources)
+    context['ti'].xcom_push(key='source_fingerprints', value=fingerprints)
+    context['ti'].xcom_push(key='dbt_selector', value=selector)
+    print(f"Changed sources: {row_counts}, dimensions: {changed_dimensions} -> dbt selector: '{selector or '(none)'}'")
 
 seed_task = PythonOperator(
     task_id='seed_raw_data',
     python_callable=seed_raw_data,
+    pool=DB_POOL,
     dag=dag,
 )
 
+# dbt selection for this run, e.g. "stg_cuota+" when only raw.cuota received data.
+# The run's data interval is the incremental window of the fact models.
+# Exit code 99 marks the task as skipped when no source changed.
+DBT_SELECTED_COMMAND = """
+{%- set selector = ti.xcom_pull(task_ids='seed_raw_data', key='dbt_selector') -%}
+{%- if selector -%}
+cd /opt/airflow/dbt && dbt COMMAND --profiles-dir /opt/airflow --select {{ selector }} \
+  --vars '{"start_date": "{{ data_interval_start | ds }}", "end_date": "{{ data_interval_end | ds }}"}'
+{%- else -%}
+echo "No raw sources changed, skipping dbt COMMAND" && exit 99
+{%- endif -%}
+"""
+
 # Task 2: Run dbt models
 dbt_run_task = BashOperator(
     task_id='dbt_run',
-    bash_command='cd /opt/airflow/dbt && dbt run --profiles-dir /opt/airflow',
+    bash_command=DBT_SELECTED_COMMAND.replace('COMMAND', 'run'),
+    on_success_callback=record_dbt_metrics,
+    on_failure_callback=record_dbt_metrics,
+    pool=DBT_POOL,
     dag=dag,
 )
 
 # Task 3: Run dbt tests
 dbt_test_task = BashOperator(
     task_id='dbt_test',
-    bash_command='cd /opt/airflow/dbt && dbt test --profiles-dir /opt/airflow',
+    bash_command=DBT_SELECTED_COMMAND.replace('COMMAND', 'test'),
+    on_success_callback=record_dbt_metrics,
+    on_failure_callback=record_dbt_metrics,
+    pool=DBT_POOL,
     dag=dag,
 )
 
 # Task 4: Data quality checks with Soda
-def run_soda_checks():
-    """Run Soda data quality checks"""
-    os.system('cd /opt/airflow && soda scan -d postgres_local -c configuration.yml tables/')
-    print("Soda data quality checks completed")
+# Only the rows loaded in this run's data interval are checked; uniqueness checks
+# look at 1/N of the keys (CLUB_PIPELINE_SODA_SAMPLE_BUCKETS, 1 = every key).
+# Full-table scans run weekly in club_analytics_weekly_quality.
+SODA_SAMPLE_BUCKETS = int(os.environ.get('CLUB_PIPELINE_SODA_SAMPLE_BUCKETS', '1'))
+
+def run_soda_checks(**context):
+    """Run incremental Soda checks on the rows loaded in this run; fail on any failed check"""
+    postgres_hook = PostgresHook(postgres_conn_id='postgres_default')
+    metrics = StageMetrics(run_id=context['run_id'])
+    try:
+        with metrics.span('soda.scan', mode='incremental') as span:
+            summary = run_scan(
+                postgres_hook.get_uri(),
+                mode='incremental',
+                start_date=context['data_interval_start'].strftime('%Y-%m-%d'),
+                end_date=context['data_interval_end'].strftime('%Y-%m-%d'),
+                sample_buckets=SODA_SAMPLE_BUCKETS,
+                checks_dir='/opt/airflow/soda/checks'
+            )
+            span['rows'] = summary['checks']
+    finally:
+        metrics.flush(METRICS_DB, METRICS_PROM)
+    print(f"Soda incremental checks passed: {summary}")
 
 soda_task = PythonOperator(
     task_id='soda_data_quality',
     python_callable=run_soda_checks,
+    trigger_rule='none_failed',
+    pool=DB_POOL,
     dag=dag,
 )
 
 # Task 5: Calculate daily metrics
-def calculate_daily_metrics():
-    """Calculate and export daily metrics"""
+def calculate_daily_metrics(**context):
+    """Calculate and upsert daily metrics, then append them to the metrics store"""
     postgres_hook = PostgresHook(postgres_conn_id='postgres_default')
+    engine = KPIEngine(postgres_hook.get_uri())
+    metrics = StageMetrics(run_id=context['run_id'])
     
-    # Calculate MRR (Monthly Recurring Revenue)
-    mrr_query = """
-    SELECT 
-        SUM(payment_amount) as mrr
-    FROM analytics.fact_dues_payments 
-    WHERE payment_date = CURRENT_DATE AND is_paid = true
-    """
-    mrr_result = postgres_hook.get_first(mrr_query)
-    mrr = mrr_result[0] if mrr_result else 0
-    
-    # Calculate ARPPM (Average Revenue Per Paying Member)
-    arppm_query = """
-    SELECT 
-        AVG(payment_amount) as arppm
-    FROM analytics.fact_dues_payments 
-    WHERE payment_date = CURRENT_DATE AND is_paid = true
-    """
-    arppm_result = postgres_hook.get_first(arppm_query)
-    arppm = arppm_result[0] if arppm_result else 0
+    # All KPIs for the run's day in one statement, upserted into analytics.daily_metrics
+    metric_date = context['data_interval_start'].date()
+    with metrics.span('kpi.compute') as span:
+        metrics_df = engine.compute_day(metric_date)
+        span['rows'] = len(metrics_df)
+    append_to_store(metrics_df, MetricsStore(METRICS_STORE_DIR))
+    metrics.flush(METRICS_DB, METRICS_PROM)
     
-    # Calculate event revenue
-    event_revenue_query = """
-    SELECT 
-        SUM(ticket_price) as event_revenue
-    FROM analytics.fact_ticket_sales 
-    WHERE sale_date = CURRENT_DATE
-    """
-    event_revenue_result = postgres_hook.get_first(event_revenue_query)
-    event_revenue = event_revenue_result[0] if event_revenue_result else 0
-    
-    # Calculate retention rate
-    retention_query = """
-    WITH active_members AS (
-        SELECT COUNT(*) as active_count
-        FROM analytics.dim_member 
-        WHERE status_active = true
-    ),
-    new_members AS (
-        SELECT COUNT(*) as new_count
-        FROM analytics.dim_member 
-        WHERE registration_date = CURRENT_DATE
-    )
-    SELECT 
-        (active_count - new_count)::float / NULLIF(active_count, 0) as retention_rate
-    FROM active_members, new_members
-    """
-    retention_result = postgres_hook.get_first(retention_query)
-    retention_rate = retention_result[0] if retention_result else 0
-    
-    # Export metrics to file
-    metrics = {
-        'date': datetime.now().strftime('%Y-%m-%d'),
-        'mrr': mrr,
-        'arppm': arppm,
-        'event_revenue': event_revenue,
-        'retention_rate': retention_rate
-    }
-    
-    metrics_df = pd.DataFrame([metrics])
-    metrics_df.to_csv(f'/opt/airflow/data/metrics/daily_metrics_{datetime.now().strftime("%Y%m%d")}.csv', 
-                     index=False)
-    
-    print(f"Daily metrics calculated and exported: {metrics}")
+    print(f"Daily metrics calculated and stored: {metrics_df.to_dict(orient='records')}")
 
 metrics_task = PythonOperator(
     task_id='calculate_daily_metrics',
     python_callable=calculate_daily_metrics,
+    pool=DB_POOL,
+    dag=dag,
+)
+
+# Task 6: Publish the last-successful-run marker read by the dashboard caches
+def publish_dashboard_marker(**context):
+    """Mark the datasets refreshed by this run so dashboards invalidate only those caches"""
+    sources = context['ti'].xcom_pull(task_ids='seed_raw_data', key='changed_sources') or []
+    datasets = datasets_for_models(models_for_sources(sources))
+    
+    postgres_hook = PostgresHook(postgres_conn_id='postgres_default')
+    engine = postgres_hook.get_sqlalchemy_engine()
+    
+    # The dimensions are built now: later runs only rebuild them when their sources change
+    fingerprints = context['ti'].xcom_pull(task_ids='seed_raw_data', key='source_fingerprints') or {}
+    record_fingerprints(engine, fingerprints)
+    
+    published = publish_run_marker(
+        engine,
+        run_id=context['run_id'],
+        datasets=datasets,
+        data_interval_end=context['data_interval_end']
+    )
+    print(f"Published run marker for {published} datasets: {datasets}")
+
+marker_task = PythonOperator(
+    task_id='publish_run_marker',
+    python_callable=publish_dashboard_marker,
     dag=dag,
 )
 
-# Task 6: Generate data lineage report
-def generate_lineage_report():
+# Task 7: Generate data lineage report
+def generate_lineage_report(**context):
     """Generate data lineage report"""
+    # Lineage does not depend on the data interval; regenerate it on regular runs only
+    if context['dag_run'].run_type == 'backfill':
+        print("Backfill run, skipping lineage report")
+        return
+    
     os.system('cd /opt/airflow/dbt && dbt docs generate --profiles-dir /opt/airflow')
     print("Data lineage report generated")
 
 lineage_task = PythonOperator(
     task_id='generate_lineage_report',
     python_callable=generate_lineage_report,
+    pool=DBT_POOL,
     dag=dag,
 )
 
 # Define task dependencies
-seed_task >> dbt_run_task >> dbt_test_task >> soda_task >> metrics_task >> lineage_task
+seed_task >> dbt_run_task >> dbt_test_task >> soda_task >> metrics_task >> marker_task >> lineage_task
 
 
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+from airflow.providers.postgres.hooks.postgres import PostgresHook
+from sqlalchemy import create_engine
+import sys
+
+# Pipeline scripts are mounted next to the DAGs
+sys.path.append('/opt/airflow/scripts')
+
+from retention import (
+    DEFAULT_RETENTION_DAYS, RAW_TABLES, archive_raw_files, archive_raw_rows,
+    cutoff_date, load_manifest, vacuum_tables
+)
+from metrics_store import MetricsStore
+from pipeline_metrics import StageMetrics
+
+ARCHIVE_DIR = '/opt/airflow/data/archive'
+RAW_DIR = '/opt/airflow/data/raw'
+METRICS_STORE_DIR = '/opt/airflow/data/metrics/store'
+
+# Default arguments
+default_args = {
+    'owner': 'club_analytics',
+    'depends_on_past': False,
+    'start_date': datetime(2024, 1, 1),
+    'email_on_failure': False,
+    'email_on_retry': False,
+    'retries': 1,
+    'retry_delay': timedelta(minutes=15),
+}
+
+# DAG definition: raw rows and daily files older than the retention horizon
+# move to compressed Parquet under data/archive (manifest.json lists them);
+# `python scripts/retention.py restore` reloads a range when needed. The
+# metrics store parts appended during the week are compacted as well.
+dag = DAG(
+    'club_analytics_retention',
+    default_args=default_args,
+    description='Club Analytics weekly archive of cold raw data and metrics store compaction',
+    schedule_interval='@weekly',
+    catchup=False,
+    max_active_runs=1,
+    tags=['analytics', 'club', 'retention'],
+)
+
+def archive_cold_data(**context):
+    """Archive raw rows and files loaded before the retention horizon"""
+    # Horizon from CLUB_PIPELINE_RETENTION_DAYS (default 365 days)
+    cutoff = cutoff_date(DEFAULT_RETENTION_DAYS, context['data_interval_end'].date())
+    engine = create_engine(PostgresHook(postgres_conn_id='postgres_default').get_uri())
+    metrics = StageMetrics(run_id=context['run_id'])
+    manifest = load_manifest(ARCHIVE_DIR)
+    archived_rows = 0
+    try:
+        for table in RAW_TABLES:
+            with metrics.span('retention.archive_rows', table=table) as span:
+                entries = archive_raw_rows(engine, table, cutoff, ARCHIVE_DIR, manifest)
+                span['rows'] = sum(entry['rows'] for entry in entries)
+            archived_rows += span['rows']
+        if archived_rows:
+            vacuum_tables(engine, list(RAW_TABLES))
+        with metrics.span('retention.archive_files') as span:
+            files = archive_raw_files(RAW_DIR, cutoff, ARCHIVE_DIR, manifest)
+            span['rows'] = sum(entry['rows'] for entry in files)
+    finally:
+        metrics.flush('/opt/airflow/data/metrics/pipeline_metrics.db',
+                      '/opt/airflow/data/metrics/club_pipeline.prom')
+    print(f"Archived {archived_rows} raw rows and {len(files)} files loaded before {cutoff}")
+
+archive_task = PythonOperator(
+    task_id='archive_cold_data',
+    python_callable=archive_cold_data,
+    pool='club_analytics_db',
+    dag=dag,
+)
+
+def compact_metrics_store(**context):
+    """Merge the metrics store parts of every month into one file"""
+    removed = MetricsStore(METRICS_STORE_DIR).compact()
+    print(f"Compacted {len(removed)} metrics store partitions: {removed}")
+
+compact_task = PythonOperator(
+    task_id='compact_metrics_store',
+    python_callable=compact_metrics_store,
+    dag=dag,
+)
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+from airflow.providers.postgres.hooks.postgres import PostgresHook
+import sys
+
+# Pipeline scripts are mounted next to the DAGs
+sys.path.append('/opt/airflow/scripts')
+
+from quality_checks import run_scan
+from pipeline_metrics import StageMetrics
+
+# Default arguments
+default_args = {
+    'owner': 'club_analytics',
+    'depends_on_past': False,
+    'start_date': datetime(2024, 1, 1),
+    'email_on_failure': False,
+    'email_on_retry': False,
+    'retries': 1,
+    'retry_delay': timedelta(minutes=15),
+}
+
+# DAG definition: full-table quality checks (uniqueness across partitions,
+# dimensions, referential integrity). The daily pipeline only checks the rows
+# loaded in its own data interval.
+dag = DAG(
+    'club_analytics_weekly_quality',
+    default_args=default_args,
+    description='Club Analytics weekly full Soda scan over every row of the marts',
+    schedule_interval='@weekly',
+    catchup=False,
+    max_active_runs=1,
+    tags=['analytics', 'club', 'data-quality'],
+)
+
+def run_full_soda_scan(**context):
+    """Run the full Soda scan; fail the task on any failed check"""
+    postgres_hook = PostgresHook(postgres_conn_id='postgres_default')
+    metrics = StageMetrics(run_id=context['run_id'])
+    try:
+        with metrics.span('soda.scan', mode='full') as span:
+            summary = run_scan(
+                postgres_hook.get_uri(),
+                mode='full',
+                checks_dir='/opt/airflow/soda/checks'
+            )
+            span['rows'] = summary['checks']
+    finally:
+        metrics.flush('/opt/airflow/data/metrics/pipeline_metrics.db',
+                      '/opt/airflow/data/metrics/club_pipeline.prom')
+    print(f"Soda full scan passed: {summary}")
+
+full_scan_task = PythonOperator(
+    task_id='soda_full_scan',
+    python_callable=run_full_soda_scan,
+    pool='club_analytics_db',
+    dag=dag,
+)
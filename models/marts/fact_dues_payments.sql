@@ -1,8 +1,21 @@
 -- Mart model for dues payments fact
-{{ config(materialized='table') }}
+-- Incremental: rows loaded since the last build, or in the [start_date, end_date)
+-- load window when a pipeline run passes one, plus (in both cases) every pending
+-- row, whose overdue status moves with current_date
+{{ config(materialized='incremental', unique_key='dues_payment_key') }}
 
 with cuota_data as (
     select * from {{ ref('stg_cuota') }}
+    {% if is_incremental() %}
+    {% if var('start_date', none) and var('end_date', none) %}
+    where (load_date >= '{{ var("start_date") }}'::date
+           and load_date < '{{ var("end_date") }}'::date)
+       or is_paid = false
+    {% else %}
+    where loaded_at > (select coalesce(max(loaded_at), '1900-01-01'::timestamp) from {{ this }})
+       or is_paid = false
+    {% endif %}
+    {% endif %}
 ),
 
 member_dim as (
@@ -26,7 +39,9 @@ dues_payments_fact as (
         is_overdue,
         days_overdue,
         extract(month from due_date) as payment_month,
-        extract(year from due_date) as payment_year
+        extract(year from due_date) as payment_year,
+        load_date,
+        loaded_at
     from cuota_data
     left join member_dim on cuota_data.member_id = member_dim.member_id
 )
@@ -0,0 +1,84 @@
+-- Mart model for monthly member activity: one row per member and month in
+-- which the member bought a ticket or paid dues
+-- Incremental: only the activity months touched by fact rows loaded since the
+-- last build (normally just the latest month), or by the [start_date, end_date)
+-- load window when a pipeline run passes one, are recomputed
+{{ config(materialized='incremental', unique_key=['member_key', 'activity_month']) }}
+
+with
+{% if is_incremental() %}
+changed_months as (
+    select distinct cast(date_trunc('month', sale_date) as date) as activity_month
+    from {{ ref('fact_ticket_sales') }}
+    {% if var('start_date', none) and var('end_date', none) %}
+    where load_date >= '{{ var("start_date") }}'::date
+      and load_date < '{{ var("end_date") }}'::date
+    {% else %}
+    where loaded_at > (select coalesce(max(last_loaded_at), '1900-01-01'::timestamp) from {{ this }})
+    {% endif %}
+    union
+    select distinct cast(date_trunc('month', payment_date) as date) as activity_month
+    from {{ ref('fact_dues_payments') }}
+    {% if var('start_date', none) and var('end_date', none) %}
+    where is_paid = true
+      and load_date >= '{{ var("start_date") }}'::date
+      and load_date < '{{ var("end_date") }}'::date
+    {% else %}
+    where is_paid = true
+      and loaded_at > (select coalesce(max(last_loaded_at), '1900-01-01'::timestamp) from {{ this }})
+    {% endif %}
+),
+{% endif %}
+
+ticket_activity as (
+    select
+        member_key,
+        cast(date_trunc('month', sale_date) as date) as activity_month,
+        count(*) as tickets_bought,
+        sum(ticket_price) as ticket_revenue,
+        max(loaded_at) as last_loaded_at
+    from {{ ref('fact_ticket_sales') }}
+    where member_key is not null
+    {% if is_incremental() %}
+      and sale_date >= (select min(activity_month) from changed_months)
+      and cast(date_trunc('month', sale_date) as date) in (select activity_month from changed_months)
+    {% endif %}
+    group by 1, 2
+),
+
+dues_activity as (
+    select
+        member_key,
+        cast(date_trunc('month', payment_date) as date) as activity_month,
+        count(*) as dues_paid,
+        sum(payment_amount) as dues_revenue,
+        max(loaded_at) as last_loaded_at
+    from {{ ref('fact_dues_payments') }}
+    where member_key is not null
+      and is_paid = true
+    {% if is_incremental() %}
+      and payment_date >= (select min(activity_month) from changed_months)
+      and cast(date_trunc('month', payment_date) as date) in (select activity_month from changed_months)
+    {% endif %}
+    group by 1, 2
+),
+
+member_activity as (
+    select
+        coalesce(ticket_activity.member_key, dues_activity.member_key) as member_key,
+        coalesce(ticket_activity.activity_month, dues_activity.activity_month) as activity_month,
+        coalesce(ticket_activity.tickets_bought, 0) as tickets_bought,
+        coalesce(ticket_activity.ticket_revenue, 0) as ticket_revenue,
+        coalesce(dues_activity.dues_paid, 0) as dues_paid,
+        coalesce(dues_activity.dues_revenue, 0) as dues_revenue,
+        greatest(
+            coalesce(ticket_activity.last_loaded_at, '1900-01-01'::timestamp),
+            coalesce(dues_activity.last_loaded_at, '1900-01-01'::timestamp)
+        ) as last_loaded_at
+    from ticket_activity
+    full outer join dues_activity
+        on ticket_activity.member_key = dues_activity.member_key
+        and ticket_activity.activity_month = dues_activity.activity_month
+)
+
+select * from member_activity
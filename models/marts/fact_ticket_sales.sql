@@ -1,8 +1,18 @@
 -- Mart model for ticket sales fact
-{{ config(materialized='table') }}
+-- Incremental: only raw rows loaded since the last build are processed, or
+-- only the [start_date, end_date) load window when a pipeline run passes one
+{{ config(materialized='incremental', unique_key='ticket_sale_key') }}
 
 with entrada_data as (
     select * from {{ ref('stg_entrada') }}
+    {% if is_incremental() %}
+    {% if var('start_date', none) and var('end_date', none) %}
+    where load_date >= '{{ var("start_date") }}'::date
+      and load_date < '{{ var("end_date") }}'::date
+    {% else %}
+    where loaded_at > (select coalesce(max(loaded_at), '1900-01-01'::timestamp) from {{ this }})
+    {% endif %}
+    {% endif %}
 ),
 
 member_dim as (
@@ -18,16 +28,20 @@ ticket_sales_fact as (
         ticket_id as ticket_sale_key,
         entrada_data.member_id as member_key,
         entrada_data.event_key as event_key,
-        extract(epoch from current_date)::int as date_key,
+        extract(epoch from coalesce(load_date, current_date))::int as date_key,
         ticket_id,
         ticket_price,
-        current_date as sale_date,
+        coalesce(load_date, current_date) as sale_date,
         current_time as sale_time,
         current_timestamp as sale_datetime,
-        event_type
+        entrada_data.event_type,
+        load_date,
+        loaded_at
     from entrada_data
     left join member_dim on entrada_data.member_id = member_dim.member_id
+    -- event ids restart per event type (evento, partido, actividad)
     left join event_dim on entrada_data.event_key = event_dim.event_key
+        and entrada_data.event_type = event_dim.event_type
 )
 
 select * from ticket_sales_fact
@@ -0,0 +1,145 @@
+-- Mart model for monthly registration cohorts by activity month: cohort size,
+-- active members, members retained from / churned since the previous month,
+-- retention rate (active / cohort size) and churn rate (churned / previously active)
+-- Incremental: only the activity months whose member activity changed since the
+-- last build are recomputed (plus the following month, whose churn depends on
+-- them), and every month of a cohort whose size changed
+{{ config(materialized='incremental', unique_key=['cohort_month', 'activity_month']) }}
+
+with recursive members as (
+    select
+        member_key,
+        cast(date_trunc('month', registration_date) as date) as cohort_month
+    from {{ ref('dim_member') }}
+    where registration_date is not null
+),
+
+activity as (
+    select * from {{ ref('fact_member_activity') }}
+),
+
+cohorts as (
+    select
+        cohort_month,
+        count(*) as cohort_size
+    from members
+    group by cohort_month
+),
+
+bounds as (
+    select
+        (select min(cohort_month) from cohorts) as first_month,
+        (select max(activity_month) from activity) as last_month
+),
+
+-- Every month from the first cohort to the latest activity, so months without
+-- any activity still show up as zero retention
+calendar as (
+    select first_month as activity_month
+    from bounds
+    where first_month <= last_month
+    union all
+    select cast(calendar.activity_month + interval '1 month' as date)
+    from calendar
+    cross join bounds
+    where calendar.activity_month < bounds.last_month
+),
+
+{% if is_incremental() %}
+changed_months as (
+    select activity_month
+    from activity
+    where last_loaded_at > (select coalesce(max(last_loaded_at), '1900-01-01'::timestamp) from {{ this }})
+    union
+    select cast(activity_month + interval '1 month' as date)
+    from activity
+    where last_loaded_at > (select coalesce(max(last_loaded_at), '1900-01-01'::timestamp) from {{ this }})
+),
+
+resized_cohorts as (
+    select cohorts.cohort_month
+    from cohorts
+    left join (select distinct cohort_month, cohort_size from {{ this }}) built
+        on cohorts.cohort_month = built.cohort_month
+    where built.cohort_size is distinct from cohorts.cohort_size
+),
+{% endif %}
+
+grid as (
+    select
+        cohorts.cohort_month,
+        cohorts.cohort_size,
+        calendar.activity_month
+    from cohorts
+    join calendar on calendar.activity_month >= cohorts.cohort_month
+    {% if is_incremental() %}
+    where calendar.activity_month in (select activity_month from changed_months)
+       or cohorts.cohort_month in (select cohort_month from resized_cohorts)
+    {% endif %}
+),
+
+member_months as (
+    select
+        members.cohort_month,
+        activity.member_key,
+        activity.activity_month,
+        activity.ticket_revenue,
+        activity.dues_revenue,
+        activity.last_loaded_at
+    from activity
+    join members on activity.member_key = members.member_key
+    where activity.activity_month >= members.cohort_month
+    {% if is_incremental() %}
+      and (activity.activity_month >= (select cast(min(activity_month) - interval '1 month' as date) from changed_months)
+           or members.cohort_month in (select cohort_month from resized_cohorts))
+    {% endif %}
+),
+
+cohort_activity as (
+    select
+        current_month.cohort_month,
+        current_month.activity_month,
+        count(*) as active_members,
+        count(previous_month.member_key) as retained_members,
+        sum(current_month.ticket_revenue) as ticket_revenue,
+        sum(current_month.dues_revenue) as dues_revenue,
+        max(current_month.last_loaded_at) as last_loaded_at
+    from member_months current_month
+    left join member_months previous_month
+        on previous_month.member_key = current_month.member_key
+        and previous_month.activity_month = cast(current_month.activity_month - interval '1 month' as date)
+    group by current_month.cohort_month, current_month.activity_month
+),
+
+member_cohorts as (
+    select
+        grid.cohort_month,
+        grid.activity_month,
+        cast((extract(year from grid.activity_month) - extract(year from grid.cohort_month)) * 12
+            + extract(month from grid.activity_month) - extract(month from grid.cohort_month) as int)
+            as months_since_registration,
+        grid.cohort_size,
+        coalesce(current_activity.active_members, 0) as active_members,
+        coalesce(previous_activity.active_members, 0) as previous_active_members,
+        coalesce(current_activity.retained_members, 0) as retained_members,
+        coalesce(previous_activity.active_members, 0) - coalesce(current_activity.retained_members, 0)
+            as churned_members,
+        coalesce(current_activity.active_members, 0) * 1.0 / grid.cohort_size as retention_rate,
+        (coalesce(previous_activity.active_members, 0) - coalesce(current_activity.retained_members, 0)) * 1.0
+            / nullif(previous_activity.active_members, 0) as churn_rate,
+        coalesce(current_activity.ticket_revenue, 0) as ticket_revenue,
+        coalesce(current_activity.dues_revenue, 0) as dues_revenue,
+        greatest(
+            coalesce(current_activity.last_loaded_at, '1900-01-01'::timestamp),
+            coalesce(previous_activity.last_loaded_at, '1900-01-01'::timestamp)
+        ) as last_loaded_at
+    from grid
+    left join cohort_activity current_activity
+        on current_activity.cohort_month = grid.cohort_month
+        and current_activity.activity_month = grid.activity_month
+    left join cohort_activity previous_activity
+        on previous_activity.cohort_month = grid.cohort_month
+        and previous_activity.activity_month = cast(grid.activity_month - interval '1 month' as date)
+)
+
+select * from member_cohorts
@@ -19,7 +19,9 @@ renamed as (
             when estado = 0 and fechavenc < current_date 
             then current_date - fechavenc 
             else 0 
-        end as days_overdue
+        end as days_overdue,
+        load_date,
+        loaded_at
     from source_data
 )
 
@@ -18,7 +18,9 @@ renamed as (
             when idpartido is not null then 'PARTIDO'
             when idactividad is not null then 'ACTIVIDAD'
         end as event_type,
-        coalesce(idevento, idpartido, idactividad) as event_key
+        coalesce(idevento, idpartido, idactividad) as event_key,
+        load_date,
+        loaded_at
     from source_data
 )
 
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Dashboard Cache Warming for Club Analytics Pipeline
+
+Tracks the run version of every dashboard dataset seen by the app process and,
+when a new pipeline run is published, re-runs the default queries of the
+changed datasets in a background thread. The first visitor after a nightly
+run then hits a warm cache instead of every session reloading at once.
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """Warms per-dataset caches in the background when their run version changes"""
+
+    def __init__(self):
+        """Initialize with no versions seen yet"""
+        self.seen: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.threads: List[threading.Thread] = []
+
+    def changed(self, versions: Dict[str, str]) -> List[str]:
+        """Record the current versions and return datasets whose version moved"""
+        with self.lock:
+            changed = [
+                dataset for dataset, version in sorted(versions.items())
+                if dataset in self.seen and self.seen[dataset] != version
+            ]
+            self.seen.update(versions)
+        return changed
+
+    def refresh(self, versions: Dict[str, str],
+                warmers: Dict[str, Callable[[], None]]) -> Optional[threading.Thread]:
+        """Start a background warm-up for the datasets changed since the last check"""
+        jobs = [(dataset, warmers[dataset]) for dataset in self.changed(versions) if dataset in warmers]
+        if not jobs:
+            return None
+
+        thread = threading.Thread(target=self._warm, args=(jobs,), name='dashboard-cache-warmer', daemon=True)
+        thread.start()
+        self.threads = [t for t in self.threads if t.is_alive()] + [thread]
+        return thread
+
+    def _warm(self, jobs: List[tuple]) -> None:
+        """Run warm-up jobs, logging (not raising) failures"""
+        for dataset, warm in jobs:
+            try:
+                warm()
+                logger.info(f"Warmed dashboard cache for {dataset}")
+            except Exception as e:
+                logger.warning(f"Warming dashboard cache for {dataset} failed: {e}")
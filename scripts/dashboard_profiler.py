@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Dashboard Render Profiler for Club Analytics Pipeline
+
+Opt-in timing of one dashboard render:
+- sections (loaders, filters, aggregations, charts) are timed with a context
+  manager, the same way pipeline stages are timed in pipeline_metrics.py
+- every query records where its result came from (cache, database, a
+  coalesced in-flight request), its rows and its bytes
+- the profile is summarized per kind for the sidebar panel and exported as
+  JSON to track dashboard latency across releases
+"""
+
+import os
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+SECTION_KINDS = ['loader', 'filter', 'aggregation', 'chart']
+
+DEFAULT_ENABLED = os.environ.get('CLUB_DASHBOARD_PROFILE', 'false').lower() == 'true'
+
+
+class DashboardProfiler:
+    """Collects section timings and query statistics for one dashboard render"""
+
+    def __init__(self, enabled: bool = DEFAULT_ENABLED):
+        """Initialize an empty profile; a disabled profiler records nothing"""
+        self.enabled = enabled
+        self.started_at = datetime.now().isoformat()
+        self.start = time.perf_counter()
+        self.sections: List[Dict[str, Any]] = []
+        self.queries: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def section(self, name: str, kind: str):
+        """Time a block of the render (kind: loader, filter, aggregation or chart)"""
+        if not self.enabled:
+            yield
+            return
+        if kind not in SECTION_KINDS:
+            raise ValueError(f"Unknown section kind '{kind}', expected one of {SECTION_KINDS}")
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections.append({
+                'name': name,
+                'kind': kind,
+                'seconds': time.perf_counter() - start
+            })
+
+    def record_query(self, name: str, source: str, rows: int, bytes_transferred: int,
+                     seconds: float) -> None:
+        """Record one query (source: cache, database or coalesced)"""
+        if not self.enabled:
+            return
+        self.queries.append({
+            'name': name,
+            'source': source,
+            'rows': rows,
+            'bytes': bytes_transferred,
+            'seconds': seconds
+        })
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals per section kind and cache statistics"""
+        by_kind = {kind: 0.0 for kind in SECTION_KINDS}
+        for section in self.sections:
+            by_kind[section['kind']] += section['seconds']
+
+        hits = sum(1 for query in self.queries if query['source'] != 'database')
+        return {
+            'total_seconds': time.perf_counter() - self.start,
+            'seconds_by_kind': by_kind,
+            'queries': len(self.queries),
+            'cache_hits': hits,
+            'cache_misses': len(self.queries) - hits,
+            'rows': sum(query['rows'] for query in self.queries),
+            'bytes': sum(query['bytes'] for query in self.queries)
+        }
+
+    def to_dict(self, release: Optional[str] = None) -> Dict[str, Any]:
+        """Full profile of the render"""
+        return {
+            'started_at': self.started_at,
+            'release': release or os.environ.get('CLUB_DASHBOARD_RELEASE', 'dev'),
+            'summary': self.summary(),
+            'sections': self.sections,
+            'queries': self.queries
+        }
+
+    def to_json(self, release: Optional[str] = None) -> str:
+        """Profile as JSON, for export"""
+        return json.dumps(self.to_dict(release), indent=2, default=str)
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Dashboard Queries for Club Analytics Pipeline
+
+Parameterized SQL behind the Streamlit dashboard. The sidebar filters (date
+range, event types, member statuses) are pushed down into WHERE clauses,
+every query selects only the columns its chart needs and aggregates on the
+server, so page load cost follows the selected range instead of the total
+history.
+"""
+
+import re
+from datetime import date, timedelta
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+EVENT_TYPES = ['EVENT', 'PARTIDO', 'ACTIVIDAD']
+MEMBER_STATUSES = ['Active', 'Inactive']
+
+# Filter predicates. Dates use a half-open [start_date, end_date) range so the
+# sale_date / payment_date indexes can be used; lists bind as Postgres arrays.
+TICKET_FILTERS = """
+    fts.sale_date >= :start_date
+    AND fts.sale_date < :end_date
+    AND fts.event_type = ANY(:event_types)
+"""
+
+DUES_FILTERS = """
+    fdp.payment_date >= :start_date
+    AND fdp.payment_date < :end_date
+    AND dm.status = ANY(:member_statuses)
+"""
+
+DATE_BOUNDS_SQL = """
+SELECT
+    LEAST(
+        (SELECT MIN(sale_date) FROM analytics.fact_ticket_sales),
+        (SELECT MIN(payment_date) FROM analytics.fact_dues_payments)
+    ) AS min_date,
+    GREATEST(
+        (SELECT MAX(sale_date) FROM analytics.fact_ticket_sales),
+        (SELECT MAX(payment_date) FROM analytics.fact_dues_payments)
+    ) AS max_date
+"""
+
+TICKET_SUMMARY_SQL = f"""
+SELECT
+    COALESCE(SUM(fts.ticket_price), 0) AS total_revenue,
+    COUNT(*) AS tickets_sold
+FROM analytics.fact_ticket_sales fts
+WHERE {TICKET_FILTERS}
+"""
+
+DUES_SUMMARY_SQL = f"""
+SELECT
+    COALESCE(SUM(fdp.payment_amount) FILTER (WHERE fdp.is_paid), 0) AS total_dues,
+    COUNT(*) FILTER (WHERE fdp.is_paid) AS paid_payments
+FROM analytics.fact_dues_payments fdp
+LEFT JOIN analytics.dim_member dm ON fdp.member_key = dm.member_key
+WHERE {DUES_FILTERS}
+"""
+
+MEMBER_SUMMARY_SQL = """
+SELECT
+    COUNT(*) FILTER (WHERE status_active) AS active_members,
+    COUNT(*) AS total_members
+FROM analytics.dim_member
+"""
+
+MONTHLY_REVENUE_SQL = f"""
+SELECT
+    DATE_TRUNC('month', fts.sale_date)::date AS month,
+    SUM(fts.ticket_price) AS ticket_price
+FROM analytics.fact_ticket_sales fts
+WHERE {TICKET_FILTERS}
+GROUP BY 1
+ORDER BY 1
+"""
+
+EVENT_REVENUE_SQL = f"""
+SELECT
+    fts.event_type,
+    SUM(fts.ticket_price) AS ticket_price
+FROM analytics.fact_ticket_sales fts
+WHERE {TICKET_FILTERS}
+GROUP BY fts.event_type
+ORDER BY fts.event_type
+"""
+
+# Registrations and retention curves come from the incrementally maintained
+# cohort mart (one row per registration cohort and activity month)
+MEMBER_REGISTRATIONS_SQL = """
+SELECT
+    cohort_month,
+    cohort_size AS new_members
+FROM analytics.mart_member_cohorts
+WHERE months_since_registration = 0
+ORDER BY cohort_month
+"""
+
+COHORT_RETENTION_SQL = """
+SELECT
+    cohort_month,
+    months_since_registration,
+    cohort_size,
+    retention_rate,
+    churn_rate
+FROM analytics.mart_member_cohorts
+WHERE cohort_month >= DATE_TRUNC('month', CAST(:start_date AS date))
+  AND cohort_month < :end_date
+ORDER BY cohort_month, months_since_registration
+"""
+
+PAYMENT_STATUS_SQL = f"""
+SELECT
+    fdp.payment_status,
+    COUNT(*) AS count
+FROM analytics.fact_dues_payments fdp
+LEFT JOIN analytics.dim_member dm ON fdp.member_key = dm.member_key
+WHERE {DUES_FILTERS}
+GROUP BY fdp.payment_status
+ORDER BY count DESC
+"""
+
+# Detail tabs: keyset-paginated, sortable and searchable. Pages are ordered by
+# (sort column, unique key) and continue after the last row of the previous
+# page, so each page reads only its own rows through the (date, key) indexes.
+# Joins must keep one row per key (event ids restart per event type).
+DETAIL_TABLES = {
+    'Ticket Sales': {
+        'from': """analytics.fact_ticket_sales fts
+LEFT JOIN analytics.dim_member dm ON fts.member_key = dm.member_key
+LEFT JOIN analytics.dim_event de ON fts.event_key = de.event_key AND fts.event_type = de.event_type""",
+        'filters': TICKET_FILTERS,
+        'columns': {
+            'full_name': 'dm.full_name',
+            'event_name': 'de.event_name',
+            'event_type': 'fts.event_type',
+            'ticket_price': 'fts.ticket_price',
+            'sale_date': 'fts.sale_date',
+        },
+        'sort_columns': ['sale_date', 'ticket_price'],
+        'key': 'fts.ticket_sale_key',
+        'search': ['dm.full_name', 'de.event_name'],
+        'datasets': ('ticket_sales', 'members', 'events'),
+    },
+    'Dues Payments': {
+        'from': """analytics.fact_dues_payments fdp
+LEFT JOIN analytics.dim_member dm ON fdp.member_key = dm.member_key""",
+        'filters': DUES_FILTERS,
+        'columns': {
+            'full_name': 'dm.full_name',
+            'payment_amount': 'fdp.payment_amount',
+            'payment_status': 'fdp.payment_status',
+            'payment_date': 'fdp.payment_date',
+        },
+        'sort_columns': ['payment_date', 'payment_amount'],
+        'key': 'fdp.dues_payment_key',
+        'search': ['dm.full_name', 'fdp.payment_status'],
+        'datasets': ('dues_payments', 'members'),
+    },
+    'Members': {
+        'from': "analytics.dim_member",
+        'filters': None,
+        'columns': {
+            'full_name': 'full_name',
+            'status': 'status',
+            'registration_date': 'registration_date',
+            'member_tenure_months': 'member_tenure_months',
+        },
+        'sort_columns': ['registration_date', 'full_name', 'member_tenure_months'],
+        'key': 'member_key',
+        'search': ['full_name'],
+        'datasets': ('members',),
+    },
+    'Events': {
+        'from': "analytics.dim_event",
+        'filters': None,
+        'columns': {
+            'event_name': 'event_name',
+            'event_type': 'event_type',
+            'sport': 'sport',
+            'event_date': 'event_date',
+            'location': 'location',
+        },
+        'sort_columns': ['event_date', 'event_name'],
+        'key': 'event_key',
+        'search': ['event_name', 'sport', 'location'],
+        'datasets': ('events',),
+    },
+}
+
+# Datasets (see run_marker.py) each query reads from; cached results of a query
+# are invalidated when the run version of any of its datasets changes
+QUERY_DATASETS = {
+    DATE_BOUNDS_SQL: ('ticket_sales', 'dues_payments'),
+    TICKET_SUMMARY_SQL: ('ticket_sales',),
+    DUES_SUMMARY_SQL: ('dues_payments', 'members'),
+    MEMBER_SUMMARY_SQL: ('members',),
+    MONTHLY_REVENUE_SQL: ('ticket_sales',),
+    EVENT_REVENUE_SQL: ('ticket_sales',),
+    MEMBER_REGISTRATIONS_SQL: ('member_cohorts',),
+    COHORT_RETENTION_SQL: ('member_cohorts',),
+    PAYMENT_STATUS_SQL: ('dues_payments', 'members'),
+}
+
+
+def filter_params(start_date: date, end_date: date,
+                  event_types: Sequence[str] = EVENT_TYPES,
+                  member_statuses: Sequence[str] = MEMBER_STATUSES) -> Dict[str, Any]:
+    """Bind parameters for the sidebar filters (end_date is inclusive)"""
+    if end_date < start_date:
+        raise ValueError(f"end_date {end_date} is before start_date {start_date}")
+    return {
+        'start_date': start_date,
+        'end_date': end_date + timedelta(days=1),
+        'event_types': list(event_types),
+        'member_statuses': list(member_statuses),
+    }
+
+
+def month_labels(months: Sequence[Any]) -> List[str]:
+    """Chart labels for month buckets (2024-01-01 -> 2024-01; dates or ISO strings)"""
+    return [str(month)[:7] for month in months]
+
+
+def query_params(query: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Keep only the parameters a query binds, so unrelated filters don't split its cache"""
+    names = set(re.findall(r'(?<!:):(\w+)', query))
+    return {key: value for key, value in (params or {}).items() if key in names}
+
+
+def queries_for_dataset(dataset: str) -> List[str]:
+    """Queries whose results depend on a dataset"""
+    return [query for query, datasets in QUERY_DATASETS.items() if dataset in datasets]
+
+
+def detail_page_query(table: str, sort_column: str, descending: bool = True, search: str = '',
+                      cursor: Optional[Tuple[Any, Any]] = None,
+                      page_size: int = 20) -> Tuple[str, Dict[str, Any]]:
+    """Keyset page query of a detail tab (fetches page_size + 1 rows to detect a next page)"""
+    spec = DETAIL_TABLES[table]
+    if sort_column not in spec['sort_columns']:
+        raise ValueError(f"Cannot sort {table} by {sort_column}")
+
+    sort_expr = spec['columns'][sort_column]
+    direction = 'DESC' if descending else 'ASC'
+    conditions = [spec['filters']] if spec['filters'] else []
+    params: Dict[str, Any] = {'page_limit': page_size + 1}
+
+    if search.strip():
+        conditions.append('(' + ' OR '.join(f"{column} ILIKE :search" for column in spec['search']) + ')')
+        params['search'] = f"%{search.strip()}%"
+
+    if cursor is not None:
+        comparison = '<' if descending else '>'
+        conditions.append(f"({sort_expr}, {spec['key']}) {comparison} (:after_sort, :after_key)")
+        params['after_sort'], params['after_key'] = cursor
+
+    select_list = ',\n    '.join(f"{expr} AS {name}" for name, expr in spec['columns'].items())
+    lines = [f"SELECT\n    {select_list},\n    {spec['key']} AS row_key", f"FROM {spec['from']}"]
+    if conditions:
+        lines.append('WHERE ' + '\n  AND '.join(condition.strip() for condition in conditions))
+    lines += [f"ORDER BY {sort_expr} {direction}, {spec['key']} {direction}", "LIMIT :page_limit"]
+    query = '\n'.join(lines)
+    return query, params
+
+
+def page_cursor(page: Any, sort_column: str) -> Optional[Tuple[Any, Any]]:
+    """Keyset cursor (sort value, key) after the last row of a page"""
+    if len(page) == 0:
+        return None
+    last = page.iloc[-1]
+    return tuple(
+        value.item() if hasattr(value, 'item') else value
+        for value in (last[sort_column], last['row_key'])
+    )
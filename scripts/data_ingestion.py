@@ -2,17 +2,25 @@
 """
 Club Analytics Data Ingestion Script
 Simulates daily CSV generation for tickets and dues data
+
+pandas is imported by to_frame() on first use (and the Parquet metrics store
+by main()), so `--help` and importers that only need the module stay cheap.
 """
 
-import pandas as pd
-import numpy as np
-import os
 from datetime import datetime, timedelta
 import random
 from pathlib import Path
 
-def generate_ticket_data(date, num_records=50):
-    """Generate simulated ticket sales data"""
+from pipeline_metrics import StageMetrics
+
+def to_frame(records):
+    """DataFrame of generated records (pandas is imported here, on first use)"""
+    import pandas as pd
+    
+    return pd.DataFrame(records)
+
+def generate_ticket_data(date, num_records=50, start=0):
+    """Generate simulated ticket sales data (ids continue after `start` records)"""
     
     # Sample event types and prices
     event_types = ['EVENT', 'PARTIDO', 'ACTIVIDAD']
@@ -26,7 +34,7 @@ def generate_ticket_data(date, num_records=50):
     member_ids = list(range(1, 16))
     
     tickets = []
-    for i in range(num_records):
+    for i in range(start, start + num_records):
         event_type = random.choice(event_types)
         min_price, max_price = event_prices[event_type]
         
@@ -40,16 +48,21 @@ def generate_ticket_data(date, num_records=50):
         }
         tickets.append(ticket)
     
-    return pd.DataFrame(tickets)
+    # Nullable integer ids so CSV exports read "7" rather than "7.0"
+    return to_frame(tickets).astype({
+        'idevento': 'Int64',
+        'idpartido': 'Int64',
+        'idactividad': 'Int64'
+    })
 
-def generate_dues_data(date, num_records=30):
-    """Generate simulated dues payment data"""
+def generate_dues_data(date, num_records=30, start=0):
+    """Generate simulated dues payment data (ids continue after `start` records)"""
     
     # Sample member IDs
     member_ids = list(range(1, 16))
     
     dues = []
-    for i in range(num_records):
+    for i in range(start, start + num_records):
         # Generate due date (past, present, or future)
         due_date_offset = random.randint(-30, 30)
         due_date = date + timedelta(days=due_date_offset)
@@ -66,16 +79,16 @@ def generate_dues_data(date, num_records=30):
         }
         dues.append(dues_payment)
     
-    return pd.DataFrame(dues)
+    return to_frame(dues)
 
-def generate_attendance_data(date, num_records=40):
-    """Generate simulated attendance data"""
+def generate_attendance_data(date, num_records=40, start=0):
+    """Generate simulated attendance data (ids continue after `start` records)"""
     
     member_ids = list(range(1, 16))
     event_ids = list(range(1, 16))
     
     attendance = []
-    for i in range(num_records):
+    for i in range(start, start + num_records):
         attendance_record = {
             'attendance_id': f"{date.strftime('%Y%m%d')}{i+1:03d}",
             'member_id': random.choice(member_ids),
@@ -86,10 +99,16 @@ def generate_attendance_data(date, num_records=40):
         }
         attendance.append(attendance_record)
     
-    return pd.DataFrame(attendance)
+    return to_frame(attendance)
 
-def main():
+def generate_chunks(generator, date, num_records, chunk_size=10000):
+    """Yield a generator's records as DataFrames of at most chunk_size rows"""
+    for start in range(0, num_records, chunk_size):
+        yield generator(date, min(chunk_size, num_records - start), start=start)
+
+def main(run_date=None):
     """Main function to generate daily CSV files"""
+    from metrics_store import MetricsStore
     
     # Create data directories
     data_dir = Path('data')
@@ -99,47 +118,64 @@ def main():
     raw_dir.mkdir(parents=True, exist_ok=True)
     metrics_dir.mkdir(parents=True, exist_ok=True)
     
-    # Generate data for today
-    today = datetime.now()
+    # Generate data for the requested day (default: today)
+    today = run_date or datetime.now()
+    metrics = StageMetrics()
     
     print(f"Generating data for {today.strftime('%Y-%m-%d')}")
     
     # Generate ticket sales data
-    tickets_df = generate_ticket_data(today)
+    with metrics.span('ingestion.generate_tickets') as span:
+        tickets_df = generate_ticket_data(today)
+        span['rows'] = len(tickets_df)
     tickets_file = raw_dir / f"tickets_{today.strftime('%Y%m%d')}.csv"
     tickets_df.to_csv(tickets_file, index=False)
     print(f"Generated {len(tickets_df)} ticket records: {tickets_file}")
     
     # Generate dues payment data
-    dues_df = generate_dues_data(today)
+    with metrics.span('ingestion.generate_dues') as span:
+        dues_df = generate_dues_data(today)
+        span['rows'] = len(dues_df)
     dues_file = raw_dir / f"dues_{today.strftime('%Y%m%d')}.csv"
     dues_df.to_csv(dues_file, index=False)
     print(f"Generated {len(dues_df)} dues records: {dues_file}")
     
     # Generate attendance data
-    attendance_df = generate_attendance_data(today)
+    with metrics.span('ingestion.generate_attendance') as span:
+        attendance_df = generate_attendance_data(today)
+        span['rows'] = len(attendance_df)
     attendance_file = raw_dir / f"attendance_{today.strftime('%Y%m%d')}.csv"
     attendance_df.to_csv(attendance_file, index=False)
     print(f"Generated {len(attendance_df)} attendance records: {attendance_file}")
     
-    # Generate summary metrics
+    # Append the day's summary metrics to the columnar metrics store
     summary_metrics = {
-        'date': today.strftime('%Y-%m-%d'),
+        'metric_date': today.date(),
         'total_tickets': len(tickets_df),
         'total_ticket_revenue': tickets_df['precio'].sum(),
         'total_dues': len(dues_df),
         'total_dues_revenue': dues_df[dues_df['estado'] == 1]['precio'].sum(),
-        'total_attendance': len(attendance_df),
-        'files_generated': 3
+        'total_attendance': len(attendance_df)
     }
     
-    summary_file = metrics_dir / f"daily_summary_{today.strftime('%Y%m%d')}.json"
-    pd.DataFrame([summary_metrics]).to_json(summary_file, orient='records', indent=2)
-    print(f"Generated summary metrics: {summary_file}")
+    store = MetricsStore(str(metrics_dir / 'store'))
+    store.append(to_frame([summary_metrics]), 'ingestion')
+    print(f"Appended summary metrics to {store.store_dir}")
+    
+    # Record generator timings in the local stage metrics table
+    metrics.flush(
+        db_path=str(metrics_dir / 'pipeline_metrics.db'),
+        prom_path=str(metrics_dir / 'club_pipeline.prom')
+    )
     
     print("Data generation completed successfully!")
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Generate daily club CSV files')
+    parser.add_argument('--date', type=lambda value: datetime.strptime(value, '%Y-%m-%d'),
+                        help='Day to generate (YYYY-MM-DD, default: today)')
+    main(parser.parse_args().date)
 
 
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Change-aware dbt model selection for Club Analytics Pipeline
+
+Maps raw source tables to the staging models built on top of them and turns a
+set of changed sources into a dbt selector covering those models and all of
+their descendants (e.g. raw.cuota -> "stg_cuota+").
+
+Fact sources are tracked by their loaded_at watermark. The dimension sources
+(members, events, matches, activities) have no load tracking, so they are
+tracked by a content fingerprint recorded after each successful build: a
+changed table, or one never built in this warehouse, selects its dimension.
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+# Raw source table -> staging model reading from it
+SOURCE_MODELS = {
+    'socio': 'stg_socio',
+    'entrada': 'stg_entrada',
+    'cuota': 'stg_cuota',
+    'evento': 'stg_evento',
+    'partido': 'stg_partido',
+    'actividad': 'stg_actividad',
+}
+
+# Raw tables that receive rows from daily/micro-batch files and carry loaded_at
+TRACKED_SOURCES = ['entrada', 'cuota']
+
+# Raw dimension tables without loaded_at -> primary key (fingerprint row order)
+FINGERPRINTED_SOURCES = {
+    'socio': 'idsocio',
+    'evento': 'idevento',
+    'partido': 'idpartido',
+    'actividad': 'idactividad',
+}
+
+CREATE_FINGERPRINTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS analytics.source_fingerprints (
+    source VARCHAR(64) PRIMARY KEY,
+    fingerprint VARCHAR(64) NOT NULL,
+    recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+UPSERT_FINGERPRINT_SQL = """
+INSERT INTO analytics.source_fingerprints (source, fingerprint, recorded_at)
+VALUES (:source, :fingerprint, :recorded_at)
+ON CONFLICT (source) DO UPDATE SET
+    fingerprint = EXCLUDED.fingerprint,
+    recorded_at = EXCLUDED.recorded_at
+"""
+
+READ_FINGERPRINTS_SQL = "SELECT source, fingerprint FROM analytics.source_fingerprints"
+
+
+def build_dbt_selector(models: Iterable[str]) -> str:
+    """Build a dbt selector for the given models and all of their descendants"""
+    return ' '.join(f"{model}+" for model in sorted(set(models)))
+
+
+def models_for_sources(sources: Iterable[str]) -> List[str]:
+    """Return the staging models reading from the given raw tables"""
+    return sorted({SOURCE_MODELS[source] for source in sources if source in SOURCE_MODELS})
+
+
+def changed_sources(row_counts: Dict[str, int]) -> List[str]:
+    """Return the raw tables that received at least one row"""
+    return sorted(source for source, rows in row_counts.items() if rows and rows > 0)
+
+
+def selector_for_changes(row_counts: Dict[str, int]) -> str:
+    """Build the dbt selector for the sources with new rows ('' when nothing changed)"""
+    return build_dbt_selector(models_for_sources(changed_sources(row_counts)))
+
+
+def source_fingerprints(engine: Engine, sources: Dict[str, str] = FINGERPRINTED_SOURCES) -> Dict[str, str]:
+    """SHA-256 of every row of each dimension source, in primary key order"""
+    fingerprints = {}
+    with engine.connect() as conn:
+        for source, key in sources.items():
+            digest = hashlib.sha256()
+            for row in conn.execute(text(f"SELECT * FROM raw.{source} ORDER BY {key}")):
+                digest.update(repr(tuple(row)).encode())
+            fingerprints[source] = digest.hexdigest()
+    return fingerprints
+
+
+def read_recorded_fingerprints(engine: Engine) -> Dict[str, str]:
+    """Fingerprints recorded by the last successful build ({} before the first one)"""
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(text(READ_FINGERPRINTS_SQL)).fetchall()
+    except DBAPIError:
+        return {}
+    return {source: fingerprint for source, fingerprint in rows}
+
+
+def record_fingerprints(engine: Engine, fingerprints: Dict[str, str]) -> int:
+    """Record the fingerprints of the sources a successful build has caught up with"""
+    recorded_at = datetime.now()
+    rows = [
+        {'source': source, 'fingerprint': fingerprint, 'recorded_at': recorded_at}
+        for source, fingerprint in sorted(fingerprints.items())
+    ]
+    if not rows:
+        return 0
+
+    with engine.begin() as conn:
+        conn.execute(text(CREATE_FINGERPRINTS_TABLE_SQL))
+        conn.execute(text(UPSERT_FINGERPRINT_SQL), rows)
+    return len(rows)
+
+
+def changed_fingerprints(current: Dict[str, str], recorded: Dict[str, str]) -> List[str]:
+    """Return the sources whose fingerprint differs from (or is missing in) the recorded ones"""
+    return sorted(source for source, fingerprint in current.items() if recorded.get(source) != fingerprint)
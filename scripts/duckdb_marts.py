@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Embedded DuckDB Marts for Club Analytics Pipeline
+
+Builds the full star schema without a Postgres server:
+- the OLTP seed tables come from sql/init (the same scripts the Postgres
+  container runs), the daily tickets/dues files from data/raw (CSV or Parquet,
+  load_date taken from the file name)
+- the dbt models in models/staging and models/marts are rendered (config,
+  source, ref; incremental models are built in full) and run in dependency
+  order: staging models as views, marts as tables
+- the result is a single DuckDB file with the raw and analytics schemas, which
+  the dashboard, query service and KPI engine read through a duckdb:///
+  connection string (duckdb-engine)
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence
+
+try:
+    import duckdb
+except ImportError:  # optional: only needed for the embedded mode
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = Path(__file__).parent.parent
+MODELS_DIR = PROJECT_DIR / 'models'
+SEED_SQL_FILES = [PROJECT_DIR / 'sql' / 'init' / '01_create_tables.sql',
+                  PROJECT_DIR / 'sql' / 'init' / '02_insert_data.sql']
+DEFAULT_DATABASE_PATH = os.environ.get('CLUB_DUCKDB_PATH', 'data/warehouse/club_analytics.duckdb')
+DEFAULT_RAW_DIR = 'data/raw'
+
+# Daily file prefix -> raw table fed by it
+RAW_FILE_TABLES = {
+    'tickets': 'entrada',
+    'dues': 'cuota',
+}
+
+# Postgres-only lines of the init scripts (database switch)
+SEED_SKIP_PATTERN = re.compile(r'^\s*(\\c\b|CREATE DATABASE\b)', re.IGNORECASE)
+
+# Load tracking columns are added back after the seed rows are inserted: the
+# seed INSERTs list fewer values than columns, which DuckDB does not pad
+LOAD_TRACKING_PATTERN = re.compile(r'^\s*(load_date|loaded_at)\b.*,\s*$', re.IGNORECASE)
+
+ADD_LOAD_TRACKING_SQL = """
+ALTER TABLE raw.{table} ADD COLUMN load_date DATE;
+ALTER TABLE raw.{table} ADD COLUMN loaded_at TIMESTAMP DEFAULT current_timestamp;
+"""
+
+JINJA_CONFIG_PATTERN = re.compile(r"\{\{\s*config\(.*?\)\s*\}\}", re.DOTALL)
+JINJA_REF_PATTERN = re.compile(r"\{\{\s*ref\(\s*'(\w+)'\s*\)\s*\}\}")
+JINJA_SOURCE_PATTERN = re.compile(r"\{\{\s*source\(\s*'(\w+)'\s*,\s*'(\w+)'\s*\)\s*\}\}")
+JINJA_BLOCK_PATTERN = re.compile(r"\{%-?\s*(if|endif|else|elif)\b.*?-?%\}", re.DOTALL)
+JINJA_LEFTOVER_PATTERN = re.compile(r"\{[{%]")
+
+
+def duckdb_available() -> bool:
+    """Whether the embedded mode can be used"""
+    return duckdb is not None
+
+
+def strip_incremental_blocks(sql: str) -> str:
+    """Drop {% if is_incremental() %} ... {% endif %} blocks (nested ifs included)"""
+    output = []
+    position = 0
+    depth = 0  # > 0 while inside an is_incremental() block
+    for match in JINJA_BLOCK_PATTERN.finditer(sql):
+        keyword = match.group(1)
+        if depth == 0:
+            output.append(sql[position:match.start()])
+            if keyword == 'if' and 'is_incremental()' in match.group(0):
+                depth = 1
+            else:
+                raise ValueError(f"Unsupported Jinja block outside is_incremental(): {match.group(0)}")
+        elif keyword == 'if':
+            depth += 1
+        elif keyword == 'endif':
+            depth -= 1
+        position = match.end()
+    if depth:
+        raise ValueError("Unterminated {% if is_incremental() %} block")
+    output.append(sql[position:])
+    return ''.join(output)
+
+
+def render_model(sql: str, schema: str = 'analytics') -> str:
+    """Render a dbt model for a full build (config, ref, source; no incremental filters)"""
+    rendered = JINJA_CONFIG_PATTERN.sub('', sql)
+    rendered = strip_incremental_blocks(rendered)
+    rendered = JINJA_REF_PATTERN.sub(lambda match: f"{schema}.{match.group(1)}", rendered)
+    rendered = JINJA_SOURCE_PATTERN.sub(lambda match: f"{match.group(1)}.{match.group(2)}", rendered)
+    if JINJA_LEFTOVER_PATTERN.search(rendered):
+        raise ValueError("Model uses Jinja that the embedded mode cannot render")
+    return rendered.strip().rstrip(';')
+
+
+def discover_models(models_dir: Path = MODELS_DIR) -> Dict[str, Dict[str, Any]]:
+    """Staging and mart models with their SQL, materialization and dependencies"""
+    models = {}
+    for layer, materialization in [('staging', 'view'), ('marts', 'table')]:
+        for path in sorted((models_dir / layer).glob('*.sql')):
+            sql = path.read_text()
+            models[path.stem] = {
+                'sql': sql,
+                'materialized': materialization,
+                'refs': sorted(set(JINJA_REF_PATTERN.findall(sql))),
+            }
+    return models
+
+
+def build_order(models: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Models sorted so every model comes after the models it refs"""
+    ordered: List[str] = []
+    visiting = set()
+
+    def visit(name: str) -> None:
+        if name in ordered:
+            return
+        if name in visiting:
+            raise ValueError(f"Circular ref involving {name}")
+        if name not in models:
+            raise ValueError(f"Unknown model ref: {name}")
+        visiting.add(name)
+        for ref in models[name]['refs']:
+            visit(ref)
+        visiting.discard(name)
+        ordered.append(name)
+
+    for name in sorted(models):
+        visit(name)
+    return ordered
+
+
+def seed_statements(paths: Sequence[Path] = SEED_SQL_FILES) -> str:
+    """Init scripts without Postgres-only lines or load tracking columns"""
+    lines = []
+    for path in paths:
+        for line in path.read_text().splitlines():
+            if SEED_SKIP_PATTERN.match(line) or LOAD_TRACKING_PATTERN.match(line):
+                continue
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def raw_files(raw_dir: str, prefix: str) -> List[str]:
+    """Daily files of one kind, Parquet preferred over CSV for the same day"""
+    by_day: Dict[str, Path] = {}
+    for path in sorted(Path(raw_dir).glob(f"{prefix}_*.csv")) + sorted(Path(raw_dir).glob(f"{prefix}_*.parquet")):
+        by_day[path.stem] = path
+    return [str(path) for _, path in sorted(by_day.items())]
+
+
+def load_raw_files(conn, raw_dir: str) -> Dict[str, int]:
+    """Append the daily tickets/dues files to their raw tables"""
+    counts = {}
+    for prefix, table in RAW_FILE_TABLES.items():
+        files = raw_files(raw_dir, prefix)
+        counts[table] = 0
+        for reader, suffix in [('read_csv', '.csv'), ('read_parquet', '.parquet')]:
+            selected = [path for path in files if path.endswith(suffix)]
+            if not selected:
+                continue
+            columns = [row[0] for row in conn.execute(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = 'raw' AND table_name = ? ORDER BY ordinal_position", [table]
+            ).fetchall() if row[0] not in ('load_date', 'loaded_at')]
+            before = conn.execute(f"SELECT COUNT(*) FROM raw.{table}").fetchone()[0]
+            conn.execute(
+                f"""
+                INSERT INTO raw.{table} BY NAME
+                SELECT
+                    {', '.join(columns)},
+                    CAST(strptime(regexp_extract(filename, '(\\d{{8}})', 1), '%Y%m%d') AS DATE) AS load_date,
+                    CAST(current_timestamp AS TIMESTAMP) AS loaded_at
+                FROM {reader}(?, union_by_name = true, filename = true)
+                """,
+                [selected]
+            )
+            counts[table] += conn.execute(f"SELECT COUNT(*) FROM raw.{table}").fetchone()[0] - before
+    return counts
+
+
+def build_marts(database_path: str = DEFAULT_DATABASE_PATH, raw_dir: Optional[str] = DEFAULT_RAW_DIR,
+                models_dir: Path = MODELS_DIR, seed_paths: Sequence[Path] = SEED_SQL_FILES) -> Dict[str, Any]:
+    """Build raw and analytics schemas from scratch in a DuckDB file"""
+    if not duckdb_available():
+        raise RuntimeError("duckdb is not installed (pip install duckdb duckdb-engine)")
+
+    start = time.perf_counter()
+    if database_path != ':memory:':
+        Path(database_path).parent.mkdir(parents=True, exist_ok=True)
+        for path in [database_path, f"{database_path}.wal"]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    conn = duckdb.connect(database_path)
+    try:
+        conn.execute(seed_statements(seed_paths))
+        for table in RAW_FILE_TABLES.values():
+            conn.execute(ADD_LOAD_TRACKING_SQL.format(table=table))
+
+        raw_counts = load_raw_files(conn, raw_dir) if raw_dir and os.path.isdir(raw_dir) else {}
+
+        models = discover_models(models_dir)
+        timings = {}
+        for name in build_order(models):
+            model = models[name]
+            model_start = time.perf_counter()
+            conn.execute(
+                f"CREATE OR REPLACE {model['materialized'].upper()} analytics.{name} AS\n"
+                f"{render_model(model['sql'])}"
+            )
+            timings[name] = time.perf_counter() - model_start
+            logger.info(f"Built {model['materialized']} analytics.{name} in {timings[name]:.3f}s")
+
+        rows = {
+            name: conn.execute(f"SELECT COUNT(*) FROM analytics.{name}").fetchone()[0]
+            for name, model in models.items() if model['materialized'] == 'table'
+        }
+    finally:
+        conn.close()
+
+    return {
+        'database_path': database_path,
+        'raw_rows_loaded': raw_counts,
+        'model_seconds': timings,
+        'mart_rows': rows,
+        'total_seconds': time.perf_counter() - start,
+    }
+
+
+def connection_string(database_path: str = DEFAULT_DATABASE_PATH) -> str:
+    """SQLAlchemy connection string of a DuckDB file (dashboard, query service, KPI engine)"""
+    return f"duckdb:///{database_path}"
+
+
+def main():
+    """Main function for command-line usage"""
+    parser = argparse.ArgumentParser(description='Build the star schema in embedded DuckDB')
+    parser.add_argument('--database', default=DEFAULT_DATABASE_PATH, help='DuckDB file to (re)create')
+    parser.add_argument('--raw-dir', default=DEFAULT_RAW_DIR,
+                        help='Directory with tickets_/dues_YYYYMMDD.csv or .parquet files')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+
+    try:
+        result = build_marts(args.database, args.raw_dir)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"✅ Built {len(result['model_seconds'])} models in {result['total_seconds']:.2f}s: {args.database}")
+    print(f"📊 Raw rows loaded: {result['raw_rows_loaded']}, mart rows: {result['mart_rows']}")
+    print(f"🔗 CLUB_ANALYTICS_DB_URL={connection_string(args.database)}")
+
+
+if __name__ == "__main__":
+    main()
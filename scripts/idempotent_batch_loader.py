@@ -7,80 +7,127 @@ This script provides robust, idempotent batch loading capabilities using:
 - ON CONFLICT for idempotent operations
 - Proper error handling and logging
 - Support for incremental and full loads
+
+pandas, psycopg2 and SQLAlchemy are imported on the code paths that use them
+and logging is configured in main(), so importing the module (Airflow DAG
+parsing, --help, argument errors) stays cheap.
 """
 
 import os
 import sys
+import csv
+import uuid
 import logging
-import pandas as pd
-import psycopg2
-from psycopg2.extras import execute_values
-from sqlalchemy import create_engine, text
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
 import argparse
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('batch_loader.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+from pipeline_metrics import StageMetrics
+
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
+# Staging-only column numbering rows in load order (COPY assigns it row by row,
+# files in the order they are loaded); the upsert keeps the highest one per key
+STAGING_ORDINAL_COLUMN = 'staging_row_id'
+
+
+def sql_text(statement: str):
+    """SQLAlchemy text() clause (SQLAlchemy is imported on first use)"""
+    from sqlalchemy import text
+    return text(statement)
+
 
 class IdempotentBatchLoader:
     """Handles idempotent batch loading operations"""
     
-    def __init__(self, connection_string: str):
+    def __init__(self, connection_string: str, metrics: Optional[StageMetrics] = None):
         """Initialize the batch loader with database connection"""
         self.connection_string = connection_string
-        self.engine = create_engine(connection_string)
+        self._engine = None
+        self.metrics = metrics or StageMetrics()
+    
+    @property
+    def engine(self):
+        """SQLAlchemy engine, created on first use"""
+        if self._engine is None:
+            from sqlalchemy import create_engine
+            self._engine = create_engine(self.connection_string)
+        return self._engine
+    
+    def raw_connection(self):
+        """New psycopg2 connection for COPY operations (the caller closes it)"""
+        import psycopg2
+        return psycopg2.connect(self.connection_string)
         
     def create_staging_table(self, table_name: str, schema: str, columns: List[str], 
                            primary_key: str) -> str:
         """Create a staging table for batch loading"""
-        staging_table = f"{table_name}_staging_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        staging_table = (
+            f"{table_name}_staging_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        )
         
-        # Create staging table with same structure as target table
+        # Create staging table with same structure (and defaults, e.g. loaded_at) as
+        # the target table. It is a regular unlogged table rather than a TEMP table so
+        # that the COPY connection and the upsert connection both see it.
         create_staging_sql = f"""
-        CREATE TEMP TABLE {staging_table} (
-            LIKE {schema}.{table_name}
+        CREATE UNLOGGED TABLE {schema}.{staging_table} (
+            LIKE {schema}.{table_name} INCLUDING DEFAULTS,
+            {STAGING_ORDINAL_COLUMN} BIGSERIAL
         );
         """
         
-        with self.engine.connect() as conn:
-            conn.execute(text(create_staging_sql))
-            conn.commit()
+        with self.metrics.span('loader.create_staging', table=f"{schema}.{table_name}"):
+            with self.engine.connect() as conn:
+                conn.execute(sql_text(create_staging_sql))
+                conn.commit()
             
         logger.info(f"Created staging table: {staging_table}")
         return staging_table
     
+    def drop_staging_table(self, staging_table: str, schema: str) -> None:
+        """Drop a staging table created by create_staging_table"""
+        with self.engine.connect() as conn:
+            conn.execute(sql_text(f"DROP TABLE IF EXISTS {schema}.{staging_table}"))
+            conn.commit()
+    
+    def set_staging_values(self, staging_table: str, schema: str, values: Dict[str, Any]) -> None:
+        """Set constant column values (e.g. load_date) on every staged row"""
+        assignments = ', '.join(f"{column} = :{column}" for column in values)
+        with self.engine.connect() as conn:
+            conn.execute(sql_text(f"UPDATE {schema}.{staging_table} SET {assignments}"), values)
+            conn.commit()
+    
     def load_from_csv(self, csv_path: str, staging_table: str, schema: str) -> int:
         """Load data from CSV file into staging table using COPY FROM"""
         if not os.path.exists(csv_path):
             raise FileNotFoundError(f"CSV file not found: {csv_path}")
         
         # Get raw connection for COPY operations
-        raw_conn = psycopg2.connect(self.connection_string.replace('postgresql://', 'postgresql://'))
+        raw_conn = self.raw_connection()
         cursor = raw_conn.cursor()
         
         try:
-            # Use COPY FROM for efficient bulk loading
-            with open(csv_path, 'r') as f:
-                cursor.copy_expert(
-                    f"COPY {staging_table} FROM STDIN WITH CSV HEADER",
-                    f
-                )
-            
-            raw_conn.commit()
+            # Use COPY FROM for efficient bulk loading, mapping columns by the CSV
+            # header since file column order need not match the table definition
+            with self.metrics.span('loader.copy_csv', csv_path=csv_path) as span:
+                with open(csv_path, 'r') as f:
+                    header = csv.reader([f.readline()])
+                    columns_str = ', '.join(next(header))
+                    f.seek(0)
+                    cursor.copy_expert(
+                        f"COPY {schema}.{staging_table} ({columns_str}) FROM STDIN WITH CSV HEADER",
+                        f
+                    )
+                
+                raw_conn.commit()
+                span['rows'] = cursor.rowcount if cursor.rowcount >= 0 else None
             
             # Get row count
-            cursor.execute(f"SELECT COUNT(*) FROM {staging_table}")
+            cursor.execute(f"SELECT COUNT(*) FROM {schema}.{staging_table}")
             row_count = cursor.fetchone()[0]
             
             logger.info(f"Loaded {row_count} rows from {csv_path} into {staging_table}")
@@ -94,18 +141,49 @@ class IdempotentBatchLoader:
             cursor.close()
             raw_conn.close()
     
-    def load_from_dataframe(self, df: pd.DataFrame, staging_table: str, schema: str) -> int:
+    def load_from_stream(self, stream, columns: List[str], staging_table: str, schema: str) -> int:
+        """Load CSV (with header) from a file-like stream into staging table using COPY FROM"""
+        raw_conn = self.raw_connection()
+        cursor = raw_conn.cursor()
+        
+        try:
+            # COPY pulls from the stream as fast as the server accepts rows
+            with self.metrics.span('loader.copy_stream', table=f"{schema}.{staging_table}") as span:
+                cursor.copy_expert(
+                    f"COPY {schema}.{staging_table} ({', '.join(columns)}) FROM STDIN WITH CSV HEADER",
+                    stream
+                )
+                raw_conn.commit()
+                span['rows'] = cursor.rowcount if cursor.rowcount >= 0 else None
+            
+            cursor.execute(f"SELECT COUNT(*) FROM {schema}.{staging_table}")
+            row_count = cursor.fetchone()[0]
+            
+            logger.info(f"Loaded {row_count} rows from stream into {staging_table}")
+            return row_count
+            
+        except Exception as e:
+            raw_conn.rollback()
+            logger.error(f"Error loading stream into {staging_table}: {str(e)}")
+            raise
+        finally:
+            cursor.close()
+            raw_conn.close()
+    
+    def load_from_dataframe(self, df: 'pd.DataFrame', staging_table: str, schema: str) -> int:
         """Load data from DataFrame into staging table"""
         try:
             # Use pandas to_sql for DataFrame loading
-            df.to_sql(
-                staging_table,
-                self.engine,
-                schema=schema,
-                if_exists='replace',
-                index=False,
-                method='multi'
-            )
+            with self.metrics.span('loader.load_dataframe', table=f"{schema}.{staging_table}") as span:
+                df.to_sql(
+                    staging_table,
+                    self.engine,
+                    schema=schema,
+                    if_exists='append',
+                    index=False,
+                    method='multi'
+                )
+                span['rows'] = len(df)
             
             row_count = len(df)
             logger.info(f"Loaded {row_count} rows from DataFrame into {staging_table}")
@@ -119,7 +197,6 @@ class IdempotentBatchLoader:
                           schema: str, primary_key: str, 
                           update_columns: Optional[List[str]] = None) -> Dict[str, int]:
         """Perform idempotent upsert from staging table to target table"""
-        
         with self.engine.connect() as conn:
             try:
                 # Get column information
@@ -131,7 +208,7 @@ class IdempotentBatchLoader:
                 ORDER BY ordinal_position
                 """
                 
-                columns_result = conn.execute(text(columns_query))
+                columns_result = conn.execute(sql_text(columns_query))
                 all_columns = [row[0] for row in columns_result]
                 
                 # If update_columns not specified, update all non-primary key columns
@@ -142,25 +219,31 @@ class IdempotentBatchLoader:
                 columns_str = ', '.join(all_columns)
                 excluded_columns = ', '.join([f"{col} = EXCLUDED.{col}" for col in update_columns])
                 
+                # DISTINCT ON keeps the last staged version of each key (by load
+                # order, not ctid, which set_staging_values' UPDATE rewrites), so a
+                # batch that stages the same key twice does not hit the same row twice
                 upsert_sql = f"""
                 INSERT INTO {schema}.{target_table} ({columns_str})
-                SELECT {columns_str} FROM {staging_table}
+                SELECT DISTINCT ON ({primary_key}) {columns_str} FROM {schema}.{staging_table}
+                ORDER BY {primary_key}, {STAGING_ORDINAL_COLUMN} DESC
                 ON CONFLICT ({primary_key}) 
                 DO UPDATE SET {excluded_columns}
                 """
                 
                 # Execute upsert
-                result = conn.execute(text(upsert_sql))
-                conn.commit()
+                with self.metrics.span('loader.upsert', table=f"{schema}.{target_table}") as span:
+                    result = conn.execute(sql_text(upsert_sql))
+                    conn.commit()
+                    span['rows'] = result.rowcount
                 
                 # Get statistics
                 stats_query = f"""
                 SELECT 
-                    (SELECT COUNT(*) FROM {staging_table}) as total_rows,
+                    (SELECT COUNT(*) FROM {schema}.{staging_table}) as total_rows,
                     (SELECT COUNT(*) FROM {schema}.{target_table}) as target_rows
                 """
                 
-                stats_result = conn.execute(text(stats_query))
+                stats_result = conn.execute(sql_text(stats_query))
                 stats = stats_result.fetchone()
                 
                 logger.info(f"Upsert completed: {stats[0]} rows processed, {stats[1]} total rows in target")
@@ -176,9 +259,11 @@ class IdempotentBatchLoader:
                 raise
     
     def batch_load_csv(self, csv_path: str, target_table: str, schema: str, 
-                      primary_key: str, update_columns: Optional[List[str]] = None) -> Dict[str, Any]:
+                      primary_key: str, update_columns: Optional[List[str]] = None,
+                      staging_values: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Complete batch load process from CSV file"""
         logger.info(f"Starting batch load: {csv_path} -> {schema}.{target_table}")
+        staging_table = None
         
         try:
             # Create staging table
@@ -186,17 +271,14 @@ class IdempotentBatchLoader:
             
             # Load data into staging
             rows_loaded = self.load_from_csv(csv_path, staging_table, schema)
+            if staging_values:
+                self.set_staging_values(staging_table, schema, staging_values)
             
             # Perform upsert
             upsert_stats = self.upsert_from_staging(
                 staging_table, target_table, schema, primary_key, update_columns
             )
             
-            # Clean up staging table
-            with self.engine.connect() as conn:
-                conn.execute(text(f"DROP TABLE IF EXISTS {staging_table}"))
-                conn.commit()
-            
             result = {
                 'success': True,
                 'csv_path': csv_path,
@@ -218,11 +300,114 @@ class IdempotentBatchLoader:
                 'target_table': f"{schema}.{target_table}",
                 'timestamp': datetime.now().isoformat()
             }
+        finally:
+            # Clean up staging table
+            if staging_table is not None:
+                self.drop_staging_table(staging_table, schema)
     
-    def batch_load_dataframe(self, df: pd.DataFrame, target_table: str, schema: str, 
+    def batch_load_csv_files(self, csv_paths: List[str], target_table: str, schema: str, 
+                             primary_key: str, update_columns: Optional[List[str]] = None,
+                             staging_values: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Batch load several CSV files through one staging table and a single upsert"""
+        logger.info(f"Starting batch load: {len(csv_paths)} files -> {schema}.{target_table}")
+        staging_table = None
+        
+        try:
+            # Create staging table
+            staging_table = self.create_staging_table(target_table, schema, [], primary_key)
+            
+            # COPY every file into the same staging table (counts are cumulative)
+            rows_per_file = {}
+            staged_rows = 0
+            for csv_path in csv_paths:
+                total_staged = self.load_from_csv(csv_path, staging_table, schema)
+                rows_per_file[csv_path] = total_staged - staged_rows
+                staged_rows = total_staged
+            if staging_values:
+                self.set_staging_values(staging_table, schema, staging_values)
+            
+            # Perform a single upsert for the whole batch
+            upsert_stats = self.upsert_from_staging(
+                staging_table, target_table, schema, primary_key, update_columns
+            )
+            
+            result = {
+                'success': True,
+                'csv_paths': list(csv_paths),
+                'target_table': f"{schema}.{target_table}",
+                'rows_loaded': staged_rows,
+                'rows_per_file': rows_per_file,
+                'upsert_stats': upsert_stats,
+                'timestamp': datetime.now().isoformat()
+            }
+            
+            logger.info(f"Batch load completed successfully: {result}")
+            return result
+            
+        except Exception as e:
+            logger.error(f"Batch load failed: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'csv_paths': list(csv_paths),
+                'target_table': f"{schema}.{target_table}",
+                'timestamp': datetime.now().isoformat()
+            }
+        finally:
+            # Clean up staging table
+            if staging_table is not None:
+                self.drop_staging_table(staging_table, schema)
+    
+    def batch_load_stream(self, stream, columns: List[str], target_table: str, schema: str,
+                          primary_key: str, update_columns: Optional[List[str]] = None,
+                          staging_values: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Complete batch load process from a CSV stream (no intermediate file)"""
+        logger.info(f"Starting batch load: stream -> {schema}.{target_table}")
+        staging_table = None
+        
+        try:
+            # Create staging table
+            staging_table = self.create_staging_table(target_table, schema, [], primary_key)
+            
+            # Load data into staging
+            rows_loaded = self.load_from_stream(stream, columns, staging_table, schema)
+            if staging_values:
+                self.set_staging_values(staging_table, schema, staging_values)
+            
+            # Perform upsert
+            upsert_stats = self.upsert_from_staging(
+                staging_table, target_table, schema, primary_key, update_columns
+            )
+            
+            result = {
+                'success': True,
+                'target_table': f"{schema}.{target_table}",
+                'rows_loaded': rows_loaded,
+                'upsert_stats': upsert_stats,
+                'timestamp': datetime.now().isoformat()
+            }
+            
+            logger.info(f"Batch load completed successfully: {result}")
+            return result
+            
+        except Exception as e:
+            logger.error(f"Batch load failed: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'target_table': f"{schema}.{target_table}",
+                'timestamp': datetime.now().isoformat()
+            }
+        finally:
+            # Clean up staging table
+            if staging_table is not None:
+                self.drop_staging_table(staging_table, schema)
+    
+    def batch_load_dataframe(self, df: 'pd.DataFrame', target_table: str, schema: str, 
                            primary_key: str, update_columns: Optional[List[str]] = None) -> Dict[str, Any]:
         """Complete batch load process from DataFrame"""
         logger.info(f"Starting batch load: DataFrame -> {schema}.{target_table}")
+        staging_table = None
         
         try:
             # Create staging table
@@ -236,11 +421,6 @@ class IdempotentBatchLoader:
                 staging_table, target_table, schema, primary_key, update_columns
             )
             
-            # Clean up staging table
-            with self.engine.connect() as conn:
-                conn.execute(text(f"DROP TABLE IF EXISTS {staging_table}"))
-                conn.commit()
-            
             result = {
                 'success': True,
                 'target_table': f"{schema}.{target_table}",
@@ -260,6 +440,10 @@ class IdempotentBatchLoader:
                 'target_table': f"{schema}.{target_table}",
                 'timestamp': datetime.now().isoformat()
             }
+        finally:
+            # Clean up staging table
+            if staging_table is not None:
+                self.drop_staging_table(staging_table, schema)
 
 
 def main():
@@ -276,8 +460,17 @@ def main():
     
     args = parser.parse_args()
     
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('batch_loader.log'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    
     # Initialize batch loader
-    loader = IdempotentBatchLoader(args.connection_string)
+    loader = IdempotentBatchLoader(args.connection_string, metrics=StageMetrics())
     
     # Perform batch load
     result = loader.batch_load_csv(
@@ -288,6 +481,9 @@ def main():
         update_columns=args.update_columns
     )
     
+    # Persist phase timings (COPY vs upsert) for the stage report
+    loader.metrics.flush()
+    
     # Print result
     if result['success']:
         print(f"✅ Batch load successful: {result['rows_loaded']} rows loaded")
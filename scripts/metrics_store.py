@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Metrics Store for Club Analytics Pipeline
+
+One columnar dataset for the daily pipeline outputs instead of one file per day:
+- each day's metrics (ingestion summary, KPIs) are appended as a small Parquet
+  part in long form (metric_date, source, metric, value, recorded_at) under a
+  month partition (data/metrics/store/month=YYYY-MM/)
+- appends never rewrite existing files; a recomputed day is a newer row and
+  reads keep the latest value per (metric_date, source, metric)
+- compaction merges the parts of a month into one file (automatically once a
+  month has COMPACT_MAX_PARTS parts, or with `metrics_store.py compact`)
+- range reads prune month partitions; rollups by week or month and moving
+  averages feed the dashboard KPI trend charts
+"""
+
+import os
+import re
+import sys
+import glob
+import time
+import logging
+import argparse
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = os.environ.get('CLUB_METRICS_STORE_DIR', 'data/metrics/store')
+COMPACT_MAX_PARTS = 16
+PARQUET_COMPRESSION = 'zstd'
+
+STORE_SCHEMA = pa.schema([
+    ('metric_date', pa.date32()),
+    ('source', pa.string()),
+    ('metric', pa.string()),
+    ('value', pa.float64()),
+    ('recorded_at', pa.timestamp('us')),
+])
+
+STORE_KEY = ['metric_date', 'source', 'metric']
+
+# Rollup aggregation per metric (anything not listed is summed)
+ROLLUP_AGGREGATIONS = {
+    'arppm': 'mean',
+    'retention_rate': 'mean',
+}
+
+ROLLUP_PERIODS = ['day', 'week', 'month']
+
+PARTITION_PATTERN = re.compile(r'^month=(\d{4}-\d{2})$')
+
+
+def period_start(dates: pd.Series, period: str) -> pd.Series:
+    """First day of the day/week (Monday)/month each date falls in"""
+    dates = pd.to_datetime(dates)
+    if period == 'day':
+        return dates
+    if period == 'week':
+        return dates - pd.to_timedelta(dates.dt.weekday, unit='D')
+    if period == 'month':
+        return dates.dt.to_period('M').dt.start_time
+    raise ValueError(f"Unknown rollup period '{period}', expected one of {ROLLUP_PERIODS}")
+
+
+class MetricsStore:
+    """Append-only, month-partitioned Parquet dataset of daily metrics"""
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR, compact_max_parts: int = COMPACT_MAX_PARTS):
+        """Initialize the store rooted at store_dir (created on first append)"""
+        self.store_dir = Path(store_dir)
+        self.compact_max_parts = compact_max_parts
+
+    def partitions(self) -> List[str]:
+        """Months (YYYY-MM) that hold data"""
+        if not self.store_dir.exists():
+            return []
+        return sorted(
+            match.group(1) for match in
+            (PARTITION_PATTERN.match(path.name) for path in self.store_dir.iterdir()) if match
+        )
+
+    def parts(self, month: str) -> List[str]:
+        """Parquet files of one month partition"""
+        return sorted(glob.glob(str(self.store_dir / f"month={month}" / '*.parquet')))
+
+    def version(self) -> str:
+        """Changes whenever a part is appended or compacted (cache key for readers)"""
+        files = [path for month in self.partitions() for path in self.parts(month)]
+        return f"{len(files)}:{max((os.path.getmtime(path) for path in files), default=0)}"
+
+    def append(self, frame: pd.DataFrame, source: str, date_column: str = 'metric_date',
+               metrics: Optional[Sequence[str]] = None) -> int:
+        """Append the metric columns of a wide frame (one row per day); returns rows written"""
+        metrics = list(metrics or [column for column in frame.columns if column != date_column])
+        if frame.empty or not metrics:
+            return 0
+
+        long_df = frame.melt(id_vars=[date_column], value_vars=metrics, var_name='metric', value_name='value')
+        long_df = pd.DataFrame({
+            'metric_date': pd.to_datetime(long_df[date_column]).dt.date,
+            'source': source,
+            'metric': long_df['metric'],
+            'value': pd.to_numeric(long_df['value'], errors='coerce').astype('float64'),
+            'recorded_at': pd.Timestamp(datetime.now()).floor('us'),
+        })
+
+        written = 0
+        months = pd.to_datetime(long_df['metric_date']).dt.strftime('%Y-%m')
+        for month, month_df in long_df.groupby(months):
+            self._write_part(month, pa.Table.from_pandas(month_df, schema=STORE_SCHEMA, preserve_index=False),
+                             'part')
+            written += len(month_df)
+            if len(self.parts(month)) >= self.compact_max_parts:
+                self.compact_partition(month)
+        return written
+
+    def _write_part(self, month: str, table: pa.Table, prefix: str) -> str:
+        """Write one Parquet file atomically (readers never see a partial file)"""
+        directory = self.store_dir / f"month={month}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{prefix}-{time.time_ns()}-{os.getpid()}.parquet"
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path, compression=PARQUET_COMPRESSION)
+        os.replace(tmp_path, path)
+        return str(path)
+
+    def _read_parts(self, months: Sequence[str]) -> pd.DataFrame:
+        """Latest value per key from the parts of the given months"""
+        for _ in range(3):
+            files = [path for month in months for path in self.parts(month)]
+            try:
+                tables = [pq.read_table(path, schema=STORE_SCHEMA) for path in files]
+                break
+            except FileNotFoundError:
+                # A concurrent compaction replaced the parts; list them again
+                continue
+        else:
+            raise RuntimeError(f"Metrics store parts kept changing while reading {self.store_dir}")
+
+        if not tables:
+            return STORE_SCHEMA.empty_table().to_pandas()
+        df = pa.concat_tables(tables).to_pandas()
+        return (df.sort_values('recorded_at', kind='stable')
+                  .drop_duplicates(STORE_KEY, keep='last')
+                  .reset_index(drop=True))
+
+    def compact_partition(self, month: str) -> int:
+        """Merge the parts of a month into one file; returns the number of files removed"""
+        files = self.parts(month)
+        if len(files) < 2:
+            return 0
+        df = self._read_parts([month]).sort_values(STORE_KEY)
+        self._write_part(month, pa.Table.from_pandas(df, schema=STORE_SCHEMA, preserve_index=False), 'compacted')
+        # Only the files merged above: parts appended meanwhile are kept
+        for path in files:
+            Path(path).unlink(missing_ok=True)
+        logger.info(f"Compacted {len(files)} files of month={month} ({len(df)} rows)")
+        return len(files)
+
+    def compact(self) -> Dict[str, int]:
+        """Compact every month partition holding more than one file"""
+        return {month: removed for month in self.partitions() if (removed := self.compact_partition(month))}
+
+    def read_long(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                  metrics: Optional[Sequence[str]] = None, source: Optional[str] = None) -> pd.DataFrame:
+        """Latest rows in [start_date, end_date] in long form"""
+        months = [
+            month for month in self.partitions()
+            if (start_date is None or month >= start_date.strftime('%Y-%m'))
+            and (end_date is None or month <= end_date.strftime('%Y-%m'))
+        ]
+        df = self._read_parts(months)
+        if start_date is not None:
+            df = df[df['metric_date'] >= start_date]
+        if end_date is not None:
+            df = df[df['metric_date'] <= end_date]
+        if metrics is not None:
+            df = df[df['metric'].isin(metrics)]
+        if source is not None:
+            df = df[df['source'] == source]
+        return df.sort_values(STORE_KEY).reset_index(drop=True)
+
+    def read_range(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                   metrics: Optional[Sequence[str]] = None, source: Optional[str] = None) -> pd.DataFrame:
+        """One row per day, one column per metric"""
+        df = self.read_long(start_date, end_date, metrics, source)
+        if df.empty:
+            return pd.DataFrame(columns=['metric_date'] + list(metrics or []))
+        wide = df.pivot_table(index='metric_date', columns='metric', values='value', aggfunc='last')
+        wide = wide.reindex(columns=list(metrics)) if metrics is not None else wide
+        wide.columns.name = None
+        return wide.reset_index()
+
+    def rollup(self, period: str, start_date: Optional[date] = None, end_date: Optional[date] = None,
+               metrics: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Metrics per day/week/month (sums, or means for ratio metrics; see ROLLUP_AGGREGATIONS)"""
+        daily = self.read_range(start_date, end_date, metrics)
+        if daily.empty:
+            return pd.DataFrame(columns=['period', 'days'] + list(daily.columns[1:]))
+
+        columns = [column for column in daily.columns if column != 'metric_date']
+        daily['period'] = period_start(daily['metric_date'], period)
+        grouped = daily.groupby('period')
+        result = grouped[columns].agg({column: ROLLUP_AGGREGATIONS.get(column, 'sum') for column in columns})
+        result.insert(0, 'days', grouped.size())
+        return result.reset_index()
+
+    def moving_average(self, window: int, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                       metrics: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Daily metrics plus a trailing window-day moving average column per metric (<metric>_ma<window>)"""
+        daily = self.read_range(start_date, end_date, metrics)
+        if daily.empty:
+            return daily
+
+        columns = [column for column in daily.columns if column != 'metric_date']
+        # Calendar days, so a missing day shortens the window instead of stretching it
+        daily = daily.set_index(pd.to_datetime(daily['metric_date'])).drop(columns='metric_date')
+        daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq='D'))
+        for column in columns:
+            daily[f"{column}_ma{window}"] = daily[column].rolling(window, min_periods=1).mean()
+        daily.index.name = 'metric_date'
+        return daily.reset_index()
+
+    def import_files(self, metrics_dir: str) -> Dict[str, int]:
+        """Append the legacy daily_summary_*.json and daily_metrics_*.csv files"""
+        counts = {'ingestion': 0, 'kpi': 0}
+        summary_files = sorted(Path(metrics_dir).glob('daily_summary_*.json'))
+        if summary_files:
+            summaries = pd.concat([pd.read_json(path, orient='records') for path in summary_files])
+            counts['ingestion'] = self.append(summaries.drop(columns=['files_generated'], errors='ignore'),
+                                              'ingestion', date_column='date')
+        metrics_files = sorted(Path(metrics_dir).glob('daily_metrics_*.csv'))
+        if metrics_files:
+            counts['kpi'] = self.append(pd.concat([pd.read_csv(path) for path in metrics_files]),
+                                        'kpi', date_column='date')
+        return counts
+
+
+def main():
+    """Main function for command-line usage"""
+    parser = argparse.ArgumentParser(description='Columnar store of daily pipeline metrics')
+    parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR, help='Metrics store directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('compact', help='Merge the parts of every month partition')
+
+    import_parser = subparsers.add_parser('import-files', help='Append legacy per-day summary/metrics files')
+    import_parser.add_argument('--metrics-dir', default='data/metrics',
+                               help='Directory with daily_summary_*.json / daily_metrics_*.csv')
+
+    query_parser = subparsers.add_parser('query', help='Print metrics for a date range')
+    query_parser.add_argument('--start-date', type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+                              help='First day (YYYY-MM-DD)')
+    query_parser.add_argument('--end-date', type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+                              help='Last day (YYYY-MM-DD)')
+    query_parser.add_argument('--period', choices=ROLLUP_PERIODS, default='day', help='Rollup period')
+    query_parser.add_argument('--metrics', nargs='*', help='Metrics to read (default: all)')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+
+    store = MetricsStore(args.store_dir)
+    if args.command == 'compact':
+        removed = store.compact()
+        print(f"✅ Compacted {len(removed)} partitions ({sum(removed.values())} files merged)")
+    elif args.command == 'import-files':
+        counts = store.import_files(args.metrics_dir)
+        print(f"✅ Imported metric rows: {counts}")
+    else:
+        result = store.rollup(args.period, args.start_date, args.end_date, args.metrics)
+        print(result.to_string(index=False) if not result.empty else "No metrics in range")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Pipeline Stage Metrics for Club Analytics Pipeline
+
+Records timing spans and row counts for every pipeline stage (ingestion
+generators, loader phases, DAG tasks, dbt models, Soda scans):
+- Spans are collected in memory and flushed to a local SQLite metrics table
+- The latest sample per stage is exported as a Prometheus textfile
+- A report lists the slowest stages and regressions against previous runs
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import statistics
+import uuid
+from contextlib import closing, contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Union
+
+DEFAULT_DB_PATH = os.environ.get('PIPELINE_METRICS_DB', 'data/metrics/pipeline_metrics.db')
+DEFAULT_PROM_PATH = os.environ.get('PIPELINE_METRICS_PROM', 'data/metrics/club_pipeline.prom')
+
+CREATE_SPANS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS stage_spans (
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    duration_seconds REAL NOT NULL,
+    rows INTEGER,
+    rows_per_second REAL,
+    status TEXT NOT NULL,
+    labels TEXT
+)
+"""
+
+CREATE_SPANS_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_stage_spans_stage_started ON stage_spans (stage, started_at)
+"""
+
+
+class StageMetrics:
+    """Collects timing spans and row counts for one pipeline run"""
+
+    def __init__(self, run_id: Optional[str] = None):
+        """Initialize an empty collector for a run"""
+        self.run_id = run_id or f"{datetime.now().strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.spans: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def span(self, stage: str, **labels):
+        """Time a block; set span['rows'] inside the block to record throughput"""
+        span = {
+            'stage': stage,
+            'started_at': utc_timestamp(),
+            'rows': None,
+            'status': 'success',
+            'labels': labels
+        }
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception:
+            span['status'] = 'failed'
+            raise
+        finally:
+            self._finish(span, time.perf_counter() - start)
+
+    def record(self, stage: str, duration_seconds: float, rows: Optional[int] = None,
+               status: str = 'success', started_at: Union[str, datetime, None] = None, **labels) -> None:
+        """Record a span measured elsewhere (e.g. Airflow task or dbt model timings)"""
+        span = {
+            'stage': stage,
+            'started_at': utc_timestamp(started_at),
+            'rows': rows,
+            'status': status,
+            'labels': labels
+        }
+        self._finish(span, duration_seconds)
+
+    def _finish(self, span: Dict[str, Any], duration_seconds: float) -> None:
+        """Complete a span with its duration and throughput"""
+        span['duration_seconds'] = duration_seconds
+        rows = span.get('rows')
+        span['rows_per_second'] = rows / duration_seconds if rows and duration_seconds > 0 else None
+        self.spans.append(span)
+
+    def flush(self, db_path: str = DEFAULT_DB_PATH, prom_path: Optional[str] = DEFAULT_PROM_PATH) -> int:
+        """Write collected spans to the metrics table and refresh the Prometheus textfile"""
+        if not self.spans:
+            return 0
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(connect(db_path)) as conn, conn:
+            conn.executemany(
+                """
+                INSERT INTO stage_spans
+                    (run_id, stage, started_at, duration_seconds, rows, rows_per_second, status, labels)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (self.run_id, span['stage'], span['started_at'], span['duration_seconds'],
+                     span['rows'], span['rows_per_second'], span['status'],
+                     json.dumps(span['labels'], sort_keys=True, default=str))
+                    for span in self.spans
+                ]
+            )
+
+        flushed = len(self.spans)
+        self.spans = []
+
+        if prom_path:
+            write_prometheus_textfile(db_path, prom_path)
+        return flushed
+
+
+def utc_timestamp(value: Union[str, datetime, None] = None) -> str:
+    """UTC ISO timestamp with microseconds (naive values are local time), so started_at sorts as text"""
+    if value is None:
+        moment = datetime.now(timezone.utc)
+    elif isinstance(value, datetime):
+        moment = value
+    else:
+        # dbt writes a trailing Z, which fromisoformat only accepts from Python 3.11
+        moment = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    return moment.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Open the metrics database, creating the spans table if needed (the caller closes it)"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute(CREATE_SPANS_TABLE_SQL)
+    conn.execute(CREATE_SPANS_INDEX_SQL)
+    return conn
+
+
+def load_dbt_run_results(run_results_path: str, metrics: StageMetrics) -> int:
+    """Record one span per dbt node from a run_results.json file"""
+    with open(run_results_path) as f:
+        run_results = json.load(f)
+
+    command = run_results.get('args', {}).get('which', 'run')
+    for result in run_results.get('results', []):
+        node = result['unique_id'].split('.')[-1]
+        started_at = None
+        for timing in result.get('timing', []):
+            if timing.get('name') == 'execute' and timing.get('started_at'):
+                started_at = timing['started_at']
+        metrics.record(
+            stage=f"dbt.{command}.{node}",
+            duration_seconds=result.get('execution_time') or 0.0,
+            rows=(result.get('adapter_response') or {}).get('rows_affected'),
+            status='success' if result.get('status') in ('success', 'pass') else str(result.get('status')),
+            started_at=started_at
+        )
+    return len(run_results.get('results', []))
+
+
+def latest_samples(conn: sqlite3.Connection) -> List[sqlite3.Row]:
+    """Return the most recent span of every stage"""
+    conn.row_factory = sqlite3.Row
+    return conn.execute(
+        """
+        SELECT s.*
+        FROM stage_spans s
+        JOIN (
+            SELECT stage, MAX(started_at) AS started_at FROM stage_spans GROUP BY stage
+        ) latest ON latest.stage = s.stage AND latest.started_at = s.started_at
+        ORDER BY s.stage
+        """
+    ).fetchall()
+
+
+def prometheus_label(value: str) -> str:
+    """Escape a Prometheus label value"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def write_prometheus_textfile(db_path: str, prom_path: str) -> None:
+    """Export the latest sample of every stage in Prometheus text format"""
+    with closing(connect(db_path)) as conn:
+        samples = latest_samples(conn)
+
+    lines = [
+        '# HELP club_pipeline_stage_duration_seconds Duration of the latest run of a pipeline stage',
+        '# TYPE club_pipeline_stage_duration_seconds gauge',
+    ]
+    lines += [
+        f'club_pipeline_stage_duration_seconds{{stage="{prometheus_label(row["stage"])}"}} '
+        f'{row["duration_seconds"]:.6f}'
+        for row in samples
+    ]
+    lines += [
+        '# HELP club_pipeline_stage_rows Rows processed by the latest run of a pipeline stage',
+        '# TYPE club_pipeline_stage_rows gauge',
+    ]
+    lines += [
+        f'club_pipeline_stage_rows{{stage="{prometheus_label(row["stage"])}"}} {row["rows"]}'
+        for row in samples if row['rows'] is not None
+    ]
+    lines += [
+        '# HELP club_pipeline_stage_rows_per_second Throughput of the latest run of a pipeline stage',
+        '# TYPE club_pipeline_stage_rows_per_second gauge',
+    ]
+    lines += [
+        f'club_pipeline_stage_rows_per_second{{stage="{prometheus_label(row["stage"])}"}} '
+        f'{row["rows_per_second"]:.3f}'
+        for row in samples if row['rows_per_second'] is not None
+    ]
+
+    # Write atomically so the node exporter never reads a partial file
+    Path(prom_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{prom_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(tmp_path, prom_path)
+
+
+def build_report(db_path: str, top: int = 10, history: int = 10,
+                 regression_ratio: float = 1.5) -> Dict[str, Any]:
+    """Slowest stages of the latest run plus regressions against previous runs"""
+    with closing(connect(db_path)) as conn:
+        samples = latest_samples(conn)
+
+        regressions = []
+        for row in samples:
+            previous = [
+                prev[0] for prev in conn.execute(
+                    """
+                    SELECT duration_seconds FROM stage_spans
+                    WHERE stage = ? AND started_at < ? AND status = 'success'
+                    ORDER BY started_at DESC LIMIT ?
+                    """,
+                    (row['stage'], row['started_at'], history)
+                )
+            ]
+            if not previous:
+                continue
+            baseline = statistics.median(previous)
+            if baseline > 0 and row['duration_seconds'] >= baseline * regression_ratio:
+                regressions.append({
+                    'stage': row['stage'],
+                    'duration_seconds': row['duration_seconds'],
+                    'baseline_seconds': baseline,
+                    'ratio': row['duration_seconds'] / baseline
+                })
+
+    slowest = sorted(samples, key=lambda row: row['duration_seconds'], reverse=True)[:top]
+    return {
+        'slowest': [
+            {
+                'stage': row['stage'],
+                'duration_seconds': row['duration_seconds'],
+                'rows': row['rows'],
+                'rows_per_second': row['rows_per_second'],
+                'run_id': row['run_id']
+            }
+            for row in slowest
+        ],
+        'regressions': sorted(regressions, key=lambda item: item['ratio'], reverse=True)
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print a human readable stage report"""
+    print("🐢 Slowest stages (latest run of each stage):")
+    for item in report['slowest']:
+        throughput = f", {item['rows_per_second']:,.0f} rows/s" if item['rows_per_second'] else ''
+        print(f"  {item['stage']:<50} {item['duration_seconds']:>10.3f}s{throughput}")
+
+    if report['regressions']:
+        print("⚠️  Regressions against previous runs:")
+        for item in report['regressions']:
+            print(f"  {item['stage']:<50} {item['duration_seconds']:>10.3f}s "
+                  f"(median {item['baseline_seconds']:.3f}s, x{item['ratio']:.2f})")
+    else:
+        print("✅ No regressions against previous runs")
+
+
+def main():
+    """Main function for command-line usage"""
+    parser = argparse.ArgumentParser(description='Pipeline Stage Metrics')
+    parser.add_argument('--db-path', default=DEFAULT_DB_PATH, help='SQLite metrics database')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    report_parser = subparsers.add_parser('report', help='Show slowest stages and regressions')
+    report_parser.add_argument('--top', type=int, default=10, help='Number of slowest stages to show')
+    report_parser.add_argument('--history', type=int, default=10,
+                               help='Previous runs used as the regression baseline')
+    report_parser.add_argument('--regression-ratio', type=float, default=1.5,
+                               help='Flag stages this many times slower than their median')
+    report_parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    dbt_parser = subparsers.add_parser('import-dbt', help='Record per-model timings from dbt')
+    dbt_parser.add_argument('--run-results', default='target/run_results.json',
+                            help='Path to dbt run_results.json')
+    dbt_parser.add_argument('--run-id', help='Pipeline run identifier')
+    dbt_parser.add_argument('--prom-path', default=DEFAULT_PROM_PATH, help='Prometheus textfile')
+
+    args = parser.parse_args()
+
+    if args.command == 'import-dbt':
+        metrics = StageMetrics(args.run_id)
+        count = load_dbt_run_results(args.run_results, metrics)
+        metrics.flush(args.db_path, args.prom_path)
+        print(f"✅ Recorded timings for {count} dbt nodes")
+        return
+
+    if not os.path.exists(args.db_path):
+        print(f"❌ Metrics database not found: {args.db_path}")
+        sys.exit(1)
+
+    report = build_report(args.db_path, args.top, args.history, args.regression_ratio)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+-- Load tracking for incremental processing
+-- Adds a loaded_at watermark and the load_date partition (the pipeline run's
+-- logical date) to the raw tables fed by daily/micro-batch files, and widens
+-- their ids to BIGINT (generated ids are YYYYMMDD + a daily sequence).
+-- New databases get these columns from sql/init/01_create_tables.sql; run this
+-- script once on existing databases, then rebuild the incremental facts with
+-- `dbt run --full-refresh --select fact_ticket_sales fact_dues_payments`.
+
+ALTER TABLE raw.entrada
+ALTER COLUMN identrada TYPE BIGINT;
+
+ALTER TABLE raw.cuota
+ALTER COLUMN idcuota TYPE BIGINT;
+
+ALTER TABLE raw.entrada
+ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+ALTER TABLE raw.cuota
+ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+ALTER TABLE raw.entrada
+ADD COLUMN IF NOT EXISTS load_date DATE;
+
+ALTER TABLE raw.cuota
+ADD COLUMN IF NOT EXISTS load_date DATE;
+
+CREATE INDEX IF NOT EXISTS idx_raw_entrada_loaded_at 
+ON raw.entrada (loaded_at);
+
+CREATE INDEX IF NOT EXISTS idx_raw_cuota_loaded_at 
+ON raw.cuota (loaded_at);
+
+CREATE INDEX IF NOT EXISTS idx_raw_entrada_load_date 
+ON raw.entrada (load_date);
+
+CREATE INDEX IF NOT EXISTS idx_raw_cuota_load_date 
+ON raw.cuota (load_date);
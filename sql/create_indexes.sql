@@ -83,6 +83,10 @@ ON analytics.fact_ticket_sales (event_key, date_key);
 CREATE INDEX IF NOT EXISTS idx_fact_ticket_sales_date_price 
 ON analytics.fact_ticket_sales (sale_date, ticket_price);
 
+-- Keyset pagination of the dashboard detail table (sort column + unique key)
+CREATE INDEX IF NOT EXISTS idx_fact_ticket_sales_sale_date_key 
+ON analytics.fact_ticket_sales (sale_date, ticket_sale_key);
+
 -- Dues payments fact table indexes
 CREATE INDEX IF NOT EXISTS idx_fact_dues_payments_member_key 
 ON analytics.fact_dues_payments (member_key);
@@ -112,6 +116,10 @@ ON analytics.fact_dues_payments (payment_date, is_paid);
 CREATE INDEX IF NOT EXISTS idx_fact_dues_payments_member_paid 
 ON analytics.fact_dues_payments (member_key, is_paid);
 
+-- Keyset pagination of the dashboard detail table (sort column + unique key)
+CREATE INDEX IF NOT EXISTS idx_fact_dues_payments_payment_date_key 
+ON analytics.fact_dues_payments (payment_date, dues_payment_key);
+
 -- ==============================================
 -- INDEXES FOR RAW TABLES
 -- ==============================================
@@ -265,3 +273,5 @@ COMMENT ON INDEX idx_fact_ticket_sales_sale_date IS 'Date range query optimizati
 COMMENT ON INDEX idx_fact_dues_payments_member_key IS 'Foreign key index for member joins';
 COMMENT ON INDEX idx_fact_dues_payments_payment_date IS 'Date range query optimization';
 COMMENT ON INDEX idx_fact_dues_payments_is_paid IS 'Filter optimization for paid/unpaid queries';
+COMMENT ON INDEX idx_fact_ticket_sales_sale_date_key IS 'Keyset pagination of ticket sales by date';
+COMMENT ON INDEX idx_fact_dues_payments_payment_date_key IS 'Keyset pagination of dues payments by date';
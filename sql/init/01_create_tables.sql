@@ -20,11 +20,13 @@ CREATE TABLE raw.socio (
 );
 
 CREATE TABLE raw.cuota (
-    idcuota INT PRIMARY KEY,
+    idcuota BIGINT PRIMARY KEY, -- YYYYMMDD + daily sequence
     precio INT NOT NULL,
     fechavenc DATE NOT NULL,
     idsocio INT NOT NULL,
     estado INT NOT NULL DEFAULT 0 CHECK (estado IN (0,1)),
+    load_date DATE,
+    loaded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (idsocio) REFERENCES raw.socio(idsocio)
 );
 
@@ -79,12 +81,14 @@ CREATE TABLE raw.partido (
 );
 
 CREATE TABLE raw.entrada (
-    identrada INT PRIMARY KEY,
+    identrada BIGINT PRIMARY KEY, -- YYYYMMDD + daily sequence
     idsocio INT NOT NULL,
     precio INT NOT NULL,
     idevento INT NULL,
     idpartido INT NULL,
     idactividad INT NULL,
+    load_date DATE,
+    loaded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (idsocio) REFERENCES raw.socio(idsocio),
     FOREIGN KEY (idevento) REFERENCES raw.evento(idevento),
     FOREIGN KEY (idpartido) REFERENCES raw.partido(idpartido),
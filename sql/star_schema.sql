@@ -64,7 +64,7 @@ CREATE TABLE fact_ticket_sales (
     member_key INT NOT NULL,
     event_key INT NOT NULL,
     date_key INT NOT NULL,
-    ticket_id INT NOT NULL,
+    ticket_id BIGINT NOT NULL,
     ticket_price DECIMAL(10,2) NOT NULL,
     sale_date DATE NOT NULL,
     sale_time TIME NOT NULL,
@@ -80,7 +80,7 @@ CREATE TABLE fact_dues_payments (
     dues_payment_key BIGINT PRIMARY KEY,
     member_key INT NOT NULL,
     date_key INT NOT NULL,
-    payment_id INT NOT NULL,
+    payment_id BIGINT NOT NULL,
     payment_amount DECIMAL(10,2) NOT NULL,
     due_date DATE NOT NULL,
     payment_date DATE NOT NULL,
@@ -0,0 +1,143 @@
+import io
+import pytest
+import sys
+import numpy as np
+import pandas as pd
+from decimal import Decimal
+from sqlalchemy import create_engine
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from arrow_fetch import compact_frame, copy_statement, integer_columns, read_frame, to_pyformat
+
+class FakeCursor:
+    """Cursor stand-in that binds parameters like psycopg2's mogrify"""
+    
+    def mogrify(self, query, params):
+        return (query % {key: repr(value) for key, value in params.items()}).encode('utf-8')
+
+class TestCompactFrame:
+    """Test cases for dtype compaction"""
+    
+    def test_fact_frame_dtypes(self):
+        """Test categoricals and int downcasts on a ticket-sales-like frame"""
+        rows = 10000
+        frame = pd.DataFrame({
+            'ticket_sale_key': np.arange(rows, dtype='int64'),
+            'ticket_price': np.random.randint(500, 2500, rows).astype(float),
+            'payment_amount': [Decimal('5000.00')] * rows,
+            'event_type': np.random.choice(['EVENT', 'PARTIDO', 'ACTIVIDAD'], rows).astype(object),
+            'full_name': [f"Socio {i % 15}" for i in range(rows)],
+            'event_key': [1.0, None] * (rows // 2),
+            'is_paid': [True] * rows,
+            'ratio': [0.5] * rows
+        })
+        compact = compact_frame(frame, integer_columns=['event_key'])
+        
+        assert compact['ticket_sale_key'].dtype == 'int16'
+        assert compact['ticket_price'].dtype == 'float64'
+        assert compact['payment_amount'].dtype == 'float64'
+        assert isinstance(compact['event_type'].dtype, pd.CategoricalDtype)
+        assert isinstance(compact['full_name'].dtype, pd.CategoricalDtype)
+        assert compact['event_key'].dtype == 'Int8'
+        assert compact['is_paid'].dtype == bool
+        assert compact['ratio'].dtype == 'float64'
+        
+        assert compact['ticket_price'].sum() == frame['ticket_price'].sum()
+        assert compact.memory_usage(deep=True).sum() < frame.memory_usage(deep=True).sum() / 4
+    
+    def test_whole_valued_floats_stay_float(self):
+        """Test that rates and amounts keep their float type whatever values they hold"""
+        frame = pd.DataFrame({
+            'retention_rate': [1.0, 0.0],
+            'amount': [Decimal('5000'), Decimal('1200')],
+            'member_key': [3.0, None]
+        })
+        compact = compact_frame(frame, integer_columns=['member_key'])
+        
+        assert compact['retention_rate'].dtype == 'float64'
+        assert compact['amount'].dtype == 'float64'
+        assert compact['member_key'].dtype == 'Int8'
+    
+    def test_integer_columns_from_description(self):
+        """Test that only int2/int4/int8 result columns count as integers"""
+        description = [('member_key', 23), ('ticket_sale_key', 20), ('amount', 1700), ('rate', 701)]
+        
+        assert integer_columns(description) == ['member_key', 'ticket_sale_key']
+    
+    def test_read_frame_pandas_path(self):
+        """Test the read_sql fallback on a database without COPY"""
+        engine = create_engine('sqlite://')
+        
+        frame = read_frame(engine, "SELECT 1 AS member_key, 1.0 AS retention_rate, 'SOCIO' AS status")
+        
+        assert frame['member_key'].dtype == 'int8'
+        assert frame['retention_rate'].dtype == 'float64'
+    
+    def test_high_cardinality_text_stays_text(self):
+        """Test that unique text columns are not turned into categoricals"""
+        frame = pd.DataFrame({'name': [f"Socio {i}" for i in range(100)]})
+        
+        assert not isinstance(compact_frame(frame)['name'].dtype, pd.CategoricalDtype)
+
+class TestCopyStatement:
+    """Test cases for the COPY export statement"""
+    
+    def test_to_pyformat(self):
+        """Test bind parameter rewriting, keeping casts and escaping percent signs"""
+        query = "SELECT x::date FROM t WHERE name LIKE '%a' AND y = ANY(:types) LIMIT :limit"
+        
+        assert to_pyformat(query) == (
+            "SELECT x::date FROM t WHERE name LIKE '%%a' AND y = ANY(%(types)s) LIMIT %(limit)s"
+        )
+    
+    def test_to_pyformat_skips_quoted_text(self):
+        """Test that ':word' inside string literals and quoted identifiers is not a parameter"""
+        query = """SELECT 'at 10:30' AS "note:raw", 'it''s :x' FROM t WHERE id = :id"""
+        
+        assert to_pyformat(query) == """SELECT 'at 10:30' AS "note:raw", 'it''s :x' FROM t WHERE id = %(id)s"""
+    
+    def test_copy_statement(self):
+        """Test that the bound query is wrapped in a CSV COPY"""
+        statement = copy_statement(FakeCursor(), "SELECT a FROM t WHERE b = :b;\n", {'b': 1})
+        
+        assert statement == "COPY (SELECT a FROM t WHERE b = 1) TO STDOUT WITH (FORMAT csv, HEADER true)"
+
+class TestArrowCSV:
+    """Test cases for parsing Postgres CSV exports with pyarrow"""
+    
+    def test_read_csv_table(self):
+        """Test booleans, dates and NULL vs empty string handling"""
+        pytest.importorskip('pyarrow')
+        from arrow_fetch import read_csv_table
+        
+        table = read_csv_table(io.BytesIO(b'id,is_paid,due_date,note\n1,t,2024-01-15,""\n2,f,,\n'))
+        frame = table.to_pandas()
+        
+        assert frame['is_paid'].tolist() == [True, False]
+        assert str(table.schema.field('due_date').type) == 'date32[day]'
+        assert frame['note'].iloc[0] == ''
+        assert pd.isna(frame['note'].iloc[1])
+    
+    def test_column_types_from_description(self):
+        """Test that result types come from the query, not from the exported values"""
+        pa = pytest.importorskip('pyarrow')
+        from arrow_fetch import arrow_column_types, read_csv_table
+        
+        # (name, Postgres type OID) as in a psycopg2 cursor description
+        column_types = arrow_column_types([('member_code', 1043), ('ticket_price', 1700), ('sale_date', 1082)])
+        
+        table = read_csv_table(io.BytesIO(b'member_code,ticket_price,sale_date\n00123,1200.00,2024-01-15\n'),
+                               column_types)
+        assert table.to_pandas()['member_code'].tolist() == ['00123']
+        assert table.schema.field('ticket_price').type == pa.float64()
+        
+        empty = read_csv_table(io.BytesIO(b'member_code,ticket_price,sale_date\n'), column_types)
+        assert empty.num_rows == 0
+        assert empty.schema.field('ticket_price').type == pa.float64()
+        assert empty.schema.field('sale_date').type == pa.date32()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
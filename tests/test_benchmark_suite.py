@@ -0,0 +1,119 @@
+import pytest
+import sys
+import json
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from benchmark_suite import (
+    DASHBOARD_QUERIES, STARTUP_COMMANDS, bench_generators, bench_startup, compare_to_baseline, heavy_modules_loaded,
+    latency_percentiles, metric, run_benchmarks, write_json
+)
+
+def results_with(**metrics):
+    """Results document holding the given metrics"""
+    return {'metrics': metrics}
+
+class TestBenchmarks:
+    """Test cases for the benchmark measurements"""
+    
+    def test_generator_throughput(self):
+        """Test that every generator is measured at every size"""
+        results = bench_generators([10, 20], repeat=1)
+        
+        assert set(results) == {
+            f"generators.{name}@{size}" for name in ['tickets', 'dues', 'attendance'] for size in [10, 20]
+        }
+        assert all(item['value'] > 0 and item['unit'] == 'rows/s' for item in results.values())
+    
+    def test_latency_percentiles(self):
+        """Test p50/p95 of query latencies"""
+        percentiles = latency_percentiles([float(i) for i in range(1, 101)])
+        
+        assert percentiles['p50'] == pytest.approx(50.5)
+        assert percentiles['p95'] == pytest.approx(95.05)
+    
+    def test_every_dashboard_query_is_benchmarked(self):
+        """Test that the dashboard section covers every query the dashboard caches"""
+        from dashboard_queries import QUERY_DATASETS
+        
+        assert set(QUERY_DATASETS) <= set(DASHBOARD_QUERIES.values())
+    
+    def test_results_are_json(self, tmp_path):
+        """Test that results are written as machine-readable JSON"""
+        results = run_benchmarks(['generators'], [10])
+        write_json(results, str(tmp_path / 'results.json'))
+        
+        loaded = json.loads((tmp_path / 'results.json').read_text())
+        assert loaded['sections'] == ['generators']
+        assert 'generators.tickets@10' in loaded['metrics']
+
+class TestStartup:
+    """Test cases for the CLI startup benchmark"""
+    
+    def test_cli_modules_import_no_heavy_dependencies(self):
+        """Test that importing the loader and the generators loads no pandas, psycopg2 or SQLAlchemy"""
+        assert heavy_modules_loaded('idempotent_batch_loader') == []
+        assert heavy_modules_loaded('data_ingestion') == []
+    
+    def test_startup_metrics(self):
+        """Test that every entry point and reference is timed"""
+        results = bench_startup(repeat=1)
+        
+        assert set(results) == {f"startup.{name}" for name in STARTUP_COMMANDS} | {
+            'startup.interpreter', 'startup.eager_imports'
+        }
+        assert all(item['value'] > 0 and item['unit'] == 's' for item in results.values())
+
+class TestBaselineComparison:
+    """Test cases for regression detection against a baseline"""
+    
+    def test_throughput_drop_is_regression(self):
+        """Test that lower throughput beyond the threshold regresses"""
+        baseline = results_with(**{'loader.csv_copy@1000': metric(1000.0, 'rows/s', 'higher')})
+        current = results_with(**{'loader.csv_copy@1000': metric(700.0, 'rows/s', 'higher')})
+        
+        [comparison] = compare_to_baseline(current, baseline)
+        assert comparison['status'] == 'regression'
+        assert comparison['change'] == pytest.approx(0.3)
+    
+    def test_latency_increase_is_regression(self):
+        """Test that higher latency beyond the threshold regresses"""
+        baseline = results_with(**{'dashboard.ticket_summary.p95': metric(0.10, 's', 'lower')})
+        current = results_with(**{'dashboard.ticket_summary.p95': metric(0.16, 's', 'lower')})
+        
+        [comparison] = compare_to_baseline(current, baseline)
+        assert comparison['status'] == 'regression'
+    
+    def test_within_threshold_is_ok(self):
+        """Test that small changes and improvements are not regressions"""
+        baseline = results_with(**{
+            'dbt.fact_ticket_sales': metric(2.0, 's', 'lower'),
+            'generators.tickets@1000': metric(1000.0, 'rows/s', 'higher'),
+        })
+        current = results_with(**{
+            'dbt.fact_ticket_sales': metric(2.2, 's', 'lower'),
+            'generators.tickets@1000': metric(2000.0, 'rows/s', 'higher'),
+        })
+        
+        statuses = {item['metric']: item['status'] for item in compare_to_baseline(current, baseline)}
+        assert statuses == {'dbt.fact_ticket_sales': 'ok', 'generators.tickets@1000': 'improvement'}
+    
+    def test_new_metric(self):
+        """Test that metrics missing from the baseline are reported as new"""
+        current = results_with(**{'dbt.total': metric(10.0, 's', 'lower')})
+        
+        [comparison] = compare_to_baseline(current, results_with())
+        assert comparison['status'] == 'new'
+    
+    def test_custom_thresholds(self):
+        """Test that a threshold override applies per section"""
+        baseline = results_with(**{'dbt.total': metric(10.0, 's', 'lower')})
+        current = results_with(**{'dbt.total': metric(11.0, 's', 'lower')})
+        
+        [comparison] = compare_to_baseline(current, baseline, {'dbt': 0.05})
+        assert comparison['status'] == 'regression'
+
+if __name__ == "__main__":
+    pytest.main([__file__])
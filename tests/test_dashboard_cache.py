@@ -0,0 +1,51 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from dashboard_cache import CacheWarmer
+
+class TestCacheWarmer:
+    """Test cases for background cache warming"""
+    
+    def test_first_observation_does_not_warm(self):
+        """Test that versions seen for the first time are only recorded"""
+        warmer = CacheWarmer()
+        
+        assert warmer.changed({'ticket_sales': 'run_1'}) == []
+        assert warmer.seen == {'ticket_sales': 'run_1'}
+    
+    def test_warms_only_changed_datasets(self):
+        """Test that only datasets with a new run version are warmed"""
+        warmer = CacheWarmer()
+        warmed = []
+        warmers = {
+            'ticket_sales': lambda: warmed.append('ticket_sales'),
+            'dues_payments': lambda: warmed.append('dues_payments'),
+        }
+        warmer.refresh({'ticket_sales': 'run_1', 'dues_payments': 'run_1'}, warmers)
+        
+        thread = warmer.refresh({'ticket_sales': 'run_1', 'dues_payments': 'run_2'}, warmers)
+        thread.join(timeout=5)
+        
+        assert warmed == ['dues_payments']
+        assert warmer.refresh({'ticket_sales': 'run_1', 'dues_payments': 'run_2'}, warmers) is None
+    
+    def test_failing_warmer_is_logged(self):
+        """Test that a failing warm-up does not stop the others"""
+        warmer = CacheWarmer()
+        warmed = []
+        
+        def broken():
+            raise RuntimeError('database unavailable')
+        
+        warmers = {'dues_payments': broken, 'ticket_sales': lambda: warmed.append('ticket_sales')}
+        warmer.changed({'dues_payments': 'run_1', 'ticket_sales': 'run_1'})
+        warmer.refresh({'dues_payments': 'run_2', 'ticket_sales': 'run_2'}, warmers).join(timeout=5)
+        
+        assert warmed == ['ticket_sales']
+
+if __name__ == "__main__":
+    pytest.main([__file__])
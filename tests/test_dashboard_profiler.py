@@ -0,0 +1,80 @@
+import pytest
+import sys
+import json
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from dashboard_profiler import DashboardProfiler, SECTION_KINDS
+
+class TestDashboardProfiler:
+    """Test cases for the dashboard render profiler"""
+    
+    def test_disabled_profiler_records_nothing(self):
+        """Test that a disabled profiler is a no-op"""
+        profiler = DashboardProfiler(enabled=False)
+        with profiler.section('ticket_summary', 'loader'):
+            pass
+        profiler.record_query('ticket_summary', 'database', 1, 100, 0.1)
+        
+        assert profiler.sections == []
+        assert profiler.queries == []
+    
+    def test_sections_are_timed_by_kind(self):
+        """Test that section timings are summed per kind"""
+        profiler = DashboardProfiler(enabled=True)
+        with profiler.section('monthly_revenue_periods', 'aggregation'):
+            pass
+        with profiler.section('monthly_revenue_chart', 'chart'):
+            pass
+        
+        summary = profiler.summary()
+        assert set(summary['seconds_by_kind']) == set(SECTION_KINDS)
+        assert [section['name'] for section in profiler.sections] == [
+            'monthly_revenue_periods', 'monthly_revenue_chart'
+        ]
+        assert summary['seconds_by_kind']['loader'] == 0.0
+    
+    def test_section_recorded_on_error(self):
+        """Test that a failing section is still timed"""
+        profiler = DashboardProfiler(enabled=True)
+        with pytest.raises(RuntimeError):
+            with profiler.section('payment_status_chart', 'chart'):
+                raise RuntimeError("render failed")
+        
+        assert len(profiler.sections) == 1
+    
+    def test_unknown_kind_rejected(self):
+        """Test that section kinds are validated"""
+        profiler = DashboardProfiler(enabled=True)
+        with pytest.raises(ValueError):
+            with profiler.section('x', 'render'):
+                pass
+    
+    def test_cache_statistics(self):
+        """Test cache hit/miss, row and byte totals"""
+        profiler = DashboardProfiler(enabled=True)
+        profiler.record_query('ticket_summary', 'database', 1, 100, 0.2)
+        profiler.record_query('dues_summary', 'cache', 1, 80, 0.01)
+        profiler.record_query('event_revenue', 'coalesced', 3, 300, 0.1)
+        
+        summary = profiler.summary()
+        assert summary['queries'] == 3
+        assert summary['cache_hits'] == 2
+        assert summary['cache_misses'] == 1
+        assert summary['rows'] == 5
+        assert summary['bytes'] == 480
+    
+    def test_json_export(self):
+        """Test that the exported profile carries the release and raw records"""
+        profiler = DashboardProfiler(enabled=True)
+        profiler.record_query('ticket_summary', 'database', 1, 100, 0.2)
+        
+        profile = json.loads(profiler.to_json(release='v1.2.0'))
+        assert profile['release'] == 'v1.2.0'
+        assert profile['queries'][0]['name'] == 'ticket_summary'
+        assert profile['summary']['cache_misses'] == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
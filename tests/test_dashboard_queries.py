@@ -0,0 +1,130 @@
+import pytest
+import sys
+import numpy as np
+import pandas as pd
+from datetime import date
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+import dashboard_queries
+from dashboard_queries import filter_params, month_labels, detail_page_query, page_cursor
+
+class TestDashboardQueries:
+    """Test cases for the dashboard query definitions"""
+    
+    def test_filter_params(self):
+        """Test that the inclusive end date becomes an exclusive bound"""
+        params = filter_params(date(2024, 1, 1), date(2024, 1, 31), ['PARTIDO'], ['Active'])
+        
+        assert params['start_date'] == date(2024, 1, 1)
+        assert params['end_date'] == date(2024, 2, 1)
+        assert params['event_types'] == ['PARTIDO']
+        assert params['member_statuses'] == ['Active']
+    
+    def test_filter_params_rejects_reversed_range(self):
+        """Test that a reversed date range is rejected"""
+        with pytest.raises(ValueError):
+            filter_params(date(2024, 2, 1), date(2024, 1, 1))
+    
+    def test_fact_queries_are_filtered(self):
+        """Test that fact queries bind the date range and never select whole rows"""
+        fact_queries = [
+            dashboard_queries.TICKET_SUMMARY_SQL, dashboard_queries.DUES_SUMMARY_SQL,
+            dashboard_queries.MONTHLY_REVENUE_SQL, dashboard_queries.EVENT_REVENUE_SQL,
+            dashboard_queries.PAYMENT_STATUS_SQL, dashboard_queries.COHORT_RETENTION_SQL,
+            detail_page_query('Ticket Sales', 'sale_date')[0],
+            detail_page_query('Dues Payments', 'payment_date')[0]
+        ]
+        for query in fact_queries:
+            assert ':start_date' in query and ':end_date' in query
+            assert '.*' not in query and 'SELECT *' not in query
+    
+    def test_month_labels(self):
+        """Test month bucket labels"""
+        assert month_labels([date(2024, 1, 1), date(2024, 12, 1)]) == ['2024-01', '2024-12']
+
+class TestDetailPagination:
+    """Test cases for keyset-paginated detail tables"""
+    
+    def test_first_page(self):
+        """Test the first page query: no cursor, one extra row to detect a next page"""
+        query, params = detail_page_query('Members', 'registration_date', page_size=20)
+        
+        assert 'ORDER BY registration_date DESC, member_key DESC' in query
+        assert 'OFFSET' not in query
+        assert params == {'page_limit': 21}
+    
+    def test_next_page_continues_after_cursor(self):
+        """Test that later pages seek past the previous page's last row"""
+        query, params = detail_page_query(
+            'Ticket Sales', 'sale_date', descending=True, cursor=(date(2024, 1, 15), 42)
+        )
+        
+        assert '(fts.sale_date, fts.ticket_sale_key) < (:after_sort, :after_key)' in query
+        assert params['after_sort'] == date(2024, 1, 15) and params['after_key'] == 42
+        
+        query, _ = detail_page_query('Ticket Sales', 'ticket_price', descending=False, cursor=(100, 42))
+        assert '(fts.ticket_price, fts.ticket_sale_key) > (:after_sort, :after_key)' in query
+        assert 'ORDER BY fts.ticket_price ASC, fts.ticket_sale_key ASC' in query
+    
+    def test_search(self):
+        """Test that search matches any searchable column case-insensitively"""
+        query, params = detail_page_query('Events', 'event_date', search='  futbol ')
+        
+        assert '(event_name ILIKE :search OR sport ILIKE :search OR location ILIKE :search)' in query
+        assert params['search'] == '%futbol%'
+    
+    def test_unknown_sort_column(self):
+        """Test that only whitelisted sort columns are accepted"""
+        with pytest.raises(ValueError):
+            detail_page_query('Members', 'document')
+    
+    def test_ticket_pages_do_not_repeat_sales(self):
+        """Test that an event id shared by two event types neither duplicates nor skips sales"""
+        pytest.importorskip('duckdb_engine')
+        from sqlalchemy import create_engine, text
+        
+        engine = create_engine('duckdb:///:memory:')
+        with engine.begin() as conn:
+            conn.execute(text("CREATE SCHEMA analytics"))
+            conn.execute(text("CREATE TABLE analytics.dim_member (member_key INT, full_name VARCHAR)"))
+            conn.execute(text("CREATE TABLE analytics.dim_event (event_key INT, event_type VARCHAR, event_name VARCHAR)"))
+            conn.execute(text(
+                "CREATE TABLE analytics.fact_ticket_sales (ticket_sale_key BIGINT, member_key INT, "
+                "event_key INT, event_type VARCHAR, ticket_price DECIMAL(10,2), sale_date DATE)"
+            ))
+            conn.execute(text("INSERT INTO analytics.dim_member VALUES (1, 'Ana')"))
+            conn.execute(text("INSERT INTO analytics.dim_event VALUES (1, 'PARTIDO', 'Clasico'), (1, 'EVENT', 'Cena')"))
+            conn.execute(text(
+                "INSERT INTO analytics.fact_ticket_sales VALUES "
+                "(10, 1, 1, 'PARTIDO', 1000, DATE '2024-01-15'), (11, 1, 1, 'EVENT', 800, DATE '2024-01-15'), "
+                "(12, 1, 1, 'PARTIDO', 1200, DATE '2024-01-15')"
+            ))
+        
+        seen, cursor = [], None
+        with engine.connect() as conn:
+            while True:
+                query, params = detail_page_query('Ticket Sales', 'sale_date', cursor=cursor, page_size=2)
+                params.update(filter_params(date(2024, 1, 1), date(2024, 1, 31)))
+                page = pd.read_sql(text(query), conn, params=dashboard_queries.query_params(query, params))
+                seen += [(row.row_key, row.event_name) for row in page.head(2).itertuples()]
+                if len(page) <= 2:
+                    break
+                cursor = page_cursor(page.head(2), 'sale_date')
+        
+        assert seen == [(12, 'Clasico'), (11, 'Cena'), (10, 'Clasico')]
+    
+    def test_page_cursor(self):
+        """Test the cursor taken from the last row, as plain Python values"""
+        page = pd.DataFrame({'sale_date': [date(2024, 1, 16), date(2024, 1, 15)],
+                             'row_key': np.array([7, 3], dtype='int16')})
+        cursor = page_cursor(page, 'sale_date')
+        
+        assert cursor == (date(2024, 1, 15), 3)
+        assert type(cursor[1]) is int
+        assert page_cursor(page.iloc[0:0], 'sale_date') is None
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -107,7 +107,9 @@ class TestDataIngestion:
     
     def test_csv_generation(self):
         """Test CSV file generation"""
+        pytest.importorskip('pyarrow')
         from data_ingestion import main
+        from metrics_store import MetricsStore
         
         # Create test data directory
         test_data_dir = Path('test_data')
@@ -126,8 +128,7 @@ class TestDataIngestion:
             expected_files = [
                 f"data/raw/tickets_{today.strftime('%Y%m%d')}.csv",
                 f"data/raw/dues_{today.strftime('%Y%m%d')}.csv",
-                f"data/raw/attendance_{today.strftime('%Y%m%d')}.csv",
-                f"data/metrics/daily_summary_{today.strftime('%Y%m%d')}.json"
+                f"data/raw/attendance_{today.strftime('%Y%m%d')}.csv"
             ]
             
             for file_path in expected_files:
@@ -135,6 +136,10 @@ class TestDataIngestion:
                 
                 # Check file is not empty
                 assert os.path.getsize(file_path) > 0, f"File {file_path} is empty"
+            
+            # Summary metrics go to the metrics store instead of a per-day file
+            assert not list(Path('data/metrics').glob('daily_summary_*.json'))
+            assert MetricsStore('data/metrics/store').partitions() == [today.strftime('%Y-%m')]
         
         finally:
             # Clean up and return to original directory
@@ -142,6 +147,22 @@ class TestDataIngestion:
             import shutil
             shutil.rmtree(test_data_dir, ignore_errors=True)
 
+    def test_csv_generation_for_date(self, tmp_path, monkeypatch):
+        """Test CSV file generation for an explicit (backfill) date"""
+        pytest.importorskip('pyarrow')
+        from data_ingestion import main
+        from metrics_store import MetricsStore
+        
+        monkeypatch.chdir(tmp_path)
+        main(datetime(2024, 1, 15))
+        
+        assert (tmp_path / 'data/raw/tickets_20240115.csv').exists()
+        assert (tmp_path / 'data/raw/dues_20240115.csv').exists()
+        
+        summary = MetricsStore(str(tmp_path / 'data/metrics/store')).read_range(source='ingestion')
+        assert list(summary['metric_date']) == [datetime(2024, 1, 15).date()]
+        assert summary['total_tickets'].iloc[0] == 50
+
 class TestDataValidation:
     """Test cases for data validation"""
     
@@ -0,0 +1,76 @@
+import pytest
+import sys
+from pathlib import Path
+from sqlalchemy import create_engine, event, text
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from dbt_selection import (
+    build_dbt_selector, changed_sources, selector_for_changes, changed_fingerprints,
+    source_fingerprints, read_recorded_fingerprints, record_fingerprints
+)
+
+@pytest.fixture
+def engine():
+    """In-memory database with attached 'raw' and 'analytics' schemas"""
+    engine = create_engine('sqlite://')
+    
+    @event.listens_for(engine, 'connect')
+    def attach_schemas(dbapi_connection, connection_record):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS raw")
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS analytics")
+    
+    return engine
+
+class TestDbtSelection:
+    """Test cases for change-aware dbt selection"""
+    
+    def test_build_dbt_selector(self):
+        assert build_dbt_selector(['stg_entrada', 'stg_cuota', 'stg_cuota']) == 'stg_cuota+ stg_entrada+'
+        assert build_dbt_selector([]) == ''
+    
+    def test_changed_sources_ignores_empty_loads(self):
+        assert changed_sources({'entrada': 0, 'cuota': 12, 'socio': None}) == ['cuota']
+    
+    def test_selector_for_changes(self):
+        assert selector_for_changes({'cuota': 30}) == 'stg_cuota+'
+        assert selector_for_changes({'entrada': 5, 'cuota': 3}) == 'stg_cuota+ stg_entrada+'
+        assert selector_for_changes({'entrada': 0, 'unknown_table': 10}) == ''
+
+class TestSourceFingerprints:
+    """Test cases for change detection on dimension sources without load tracking"""
+    
+    def test_changed_fingerprints(self):
+        """Test that changed and never-recorded sources are reported"""
+        current = {'socio': 'a', 'evento': 'b', 'partido': 'c'}
+        
+        assert changed_fingerprints(current, {}) == ['evento', 'partido', 'socio']
+        assert changed_fingerprints(current, {'socio': 'a', 'evento': 'x', 'partido': 'c'}) == ['evento']
+        assert changed_fingerprints(current, current) == []
+    
+    def test_fingerprint_follows_content(self, engine):
+        """Test that updating a dimension row changes its fingerprint and nothing else"""
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE raw.socio (idsocio INT PRIMARY KEY, nombre TEXT)"))
+            conn.execute(text("INSERT INTO raw.socio VALUES (2, 'Ana'), (1, 'Luis')"))
+        
+        sources = {'socio': 'idsocio'}
+        before = source_fingerprints(engine, sources)
+        assert source_fingerprints(engine, sources) == before
+        
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE raw.socio SET nombre = 'Ana Maria' WHERE idsocio = 2"))
+        assert source_fingerprints(engine, sources) != before
+    
+    def test_record_and_read(self, engine):
+        """Test that recorded fingerprints are read back and overwritten per source"""
+        assert read_recorded_fingerprints(engine) == {}
+        
+        assert record_fingerprints(engine, {'socio': 'a', 'evento': 'b'}) == 2
+        record_fingerprints(engine, {'socio': 'c'})
+        
+        assert read_recorded_fingerprints(engine) == {'socio': 'c', 'evento': 'b'}
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,171 @@
+import pytest
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from duckdb_marts import (
+    build_order, connection_string, discover_models, raw_files, render_model, strip_incremental_blocks
+)
+
+INCREMENTAL_MODEL = """
+{{ config(materialized='incremental', unique_key='ticket_sale_key') }}
+select * from {{ ref('stg_entrada') }}
+{% if is_incremental() %}
+{% if var('start_date', none) %}
+where load_date >= '{{ var("start_date") }}'::date
+{% else %}
+where loaded_at > (select max(loaded_at) from {{ this }})
+{% endif %}
+{% endif %}
+"""
+
+class TestModelRendering:
+    """Test cases for rendering dbt models without dbt"""
+    
+    def test_incremental_blocks_are_dropped(self):
+        """Test that nested incremental filters are removed for a full build"""
+        rendered = strip_incremental_blocks(INCREMENTAL_MODEL)
+        
+        assert 'where' not in rendered
+        assert "ref('stg_entrada')" in rendered
+    
+    def test_render_model(self):
+        """Test that config, ref and source are rendered"""
+        rendered = render_model(INCREMENTAL_MODEL)
+        
+        assert rendered == "select * from analytics.stg_entrada"
+        assert render_model("select * from {{ source('raw', 'socio') }}") == "select * from raw.socio"
+    
+    def test_unsupported_jinja_rejected(self):
+        """Test that Jinja the renderer cannot handle is not silently kept"""
+        with pytest.raises(ValueError):
+            render_model("select {{ var('x') }}")
+    
+    def test_build_order(self):
+        """Test that every model is built after the models it refs"""
+        order = build_order(discover_models())
+        
+        assert order.index('stg_entrada') < order.index('fact_ticket_sales')
+        assert order.index('dim_member') < order.index('fact_ticket_sales')
+        assert order.index('dim_event') < order.index('fact_ticket_sales')
+        assert order.index('dim_member') < order.index('fact_dues_payments')
+        assert order.index('fact_ticket_sales') < order.index('fact_member_activity')
+        assert order.index('fact_dues_payments') < order.index('fact_member_activity')
+        assert order.index('fact_member_activity') < order.index('mart_member_cohorts')
+    
+    def test_raw_files_prefer_parquet(self, tmp_path):
+        """Test that a day's Parquet file replaces its CSV"""
+        for name in ['tickets_20240101.csv', 'tickets_20240101.parquet', 'tickets_20240102.csv', 'dues_20240101.csv']:
+            (tmp_path / name).write_text('')
+        
+        assert [Path(path).name for path in raw_files(str(tmp_path), 'tickets')] == [
+            'tickets_20240101.parquet', 'tickets_20240102.csv'
+        ]
+
+class TestDuckDBBuild:
+    """Test cases for the embedded star schema build"""
+    
+    def test_build_and_read_marts(self, tmp_path):
+        """Test that marts built from daily files are readable by the dashboard and KPI code"""
+        pytest.importorskip('duckdb')
+        pytest.importorskip('duckdb_engine')
+        from data_ingestion import generate_ticket_data, generate_dues_data
+        from dashboard_queries import TICKET_SUMMARY_SQL, filter_params, query_params
+        from duckdb_marts import build_marts
+        from kpi_engine import KPIEngine
+        from query_service import QueryService
+        
+        raw_dir = tmp_path / 'raw'
+        raw_dir.mkdir()
+        day = datetime(2024, 1, 1)
+        tickets = generate_ticket_data(day, 20)
+        tickets.to_csv(raw_dir / 'tickets_20240101.csv', index=False)
+        generate_dues_data(day, 10).to_parquet(raw_dir / 'dues_20240101.parquet', index=False)
+        
+        database = str(tmp_path / 'club.duckdb')
+        result = build_marts(database, str(raw_dir))
+        assert result['raw_rows_loaded'] == {'entrada': 20, 'cuota': 10}
+        
+        service = QueryService(connection_string(database))
+        params = filter_params(date(2024, 1, 1), date(2024, 1, 1))
+        summary = service.query(TICKET_SUMMARY_SQL, query_params(TICKET_SUMMARY_SQL, params)).iloc[0]
+        assert int(summary['tickets_sold']) == 20
+        assert int(summary['total_revenue']) == int(tickets['precio'].sum())
+        service.engine.dispose()
+        
+        metrics = KPIEngine(connection_string(database)).compute_day(date(2024, 1, 1))
+        assert float(metrics.iloc[0]['event_revenue']) == float(tickets['precio'].sum())
+    
+    def test_member_cohorts(self, tmp_path):
+        """Test that the cohort mart covers every member and its retention counts add up"""
+        duckdb = pytest.importorskip('duckdb')
+        from data_ingestion import generate_ticket_data, generate_dues_data
+        from duckdb_marts import build_marts
+        
+        raw_dir = tmp_path / 'raw'
+        raw_dir.mkdir()
+        day = datetime(2024, 1, 1)
+        generate_ticket_data(day, 40).to_csv(raw_dir / 'tickets_20240101.csv', index=False)
+        generate_dues_data(day, 20).to_csv(raw_dir / 'dues_20240101.csv', index=False)
+        
+        database = str(tmp_path / 'club.duckdb')
+        build_marts(database, str(raw_dir))
+        
+        conn = duckdb.connect(database, read_only=True)
+        cohorts = conn.execute("SELECT * FROM analytics.mart_member_cohorts").df()
+        registered = conn.execute(
+            "SELECT COUNT(*) FROM analytics.dim_member WHERE registration_date IS NOT NULL"
+        ).fetchone()[0]
+        # Activity before a member's registration month belongs to no cohort month
+        active = conn.execute(
+            "SELECT activity.activity_month, COUNT(*) AS active_members "
+            "FROM analytics.fact_member_activity activity "
+            "JOIN analytics.dim_member member ON member.member_key = activity.member_key "
+            "WHERE activity.activity_month >= DATE_TRUNC('month', member.registration_date) "
+            "GROUP BY 1"
+        ).df()
+        conn.close()
+        
+        first_months = cohorts[cohorts['months_since_registration'] == 0]
+        assert int(first_months['cohort_size'].sum()) == registered
+        assert not cohorts.duplicated(['cohort_month', 'activity_month']).any()
+        assert (cohorts['retained_members'] <= cohorts['previous_active_members']).all()
+        assert (cohorts['churned_members'] == cohorts['previous_active_members'] - cohorts['retained_members']).all()
+        assert (cohorts['retention_rate'] == cohorts['active_members'] / cohorts['cohort_size']).all()
+        
+        per_month = cohorts.groupby('activity_month')['active_members'].sum()
+        for _, row in active.iterrows():
+            assert per_month[row['activity_month']] == row['active_members']
+    
+    def test_kpi_retention_uses_last_completed_month(self, tmp_path):
+        """Test that a day's retention KPI is the previous (completed) month's, not month-to-date"""
+        duckdb = pytest.importorskip('duckdb')
+        pytest.importorskip('duckdb_engine')
+        from kpi_engine import KPIEngine
+        
+        database = str(tmp_path / 'club.duckdb')
+        conn = duckdb.connect(database)
+        conn.execute("CREATE SCHEMA analytics")
+        conn.execute("CREATE TABLE analytics.fact_dues_payments (payment_date DATE, payment_amount DECIMAL(10,2), is_paid BOOLEAN)")
+        conn.execute("CREATE TABLE analytics.fact_ticket_sales (sale_date DATE, ticket_price DECIMAL(10,2))")
+        conn.execute(
+            "CREATE TABLE analytics.mart_member_cohorts (cohort_month DATE, activity_month DATE, "
+            "retained_members INT, previous_active_members INT)"
+        )
+        # February: 3 of 4 January members came back; March (in progress): 1 of 4 so far
+        conn.execute(
+            "INSERT INTO analytics.mart_member_cohorts VALUES "
+            "('2024-01-01', '2024-02-01', 2, 2), ('2023-12-01', '2024-02-01', 1, 2), "
+            "('2024-01-01', '2024-03-01', 1, 4)"
+        )
+        conn.close()
+        
+        metrics = KPIEngine(connection_string(database)).compute_range(date(2024, 3, 1), date(2024, 3, 5))
+        
+        assert metrics['retention_rate'].tolist() == pytest.approx([0.75] * 5)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,65 @@
+import pytest
+import pandas as pd
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from kpi_engine import KPIEngine, append_to_store, export_metrics_csv, parse_date
+
+class TestKPIEngine:
+    """Test cases for the KPI engine helpers"""
+    
+    def test_parse_date(self):
+        """Test CLI date parsing"""
+        assert parse_date('2024-01-15') == date(2024, 1, 15)
+        
+        with pytest.raises(ValueError):
+            parse_date('15/01/2024')
+    
+    def test_export_metrics_csv(self, tmp_path):
+        """Test one CSV per day with the legacy column layout"""
+        metrics_df = pd.DataFrame([
+            {'metric_date': date(2024, 1, 16), 'mrr': 0, 'arppm': 0,
+             'event_revenue': 1200, 'retention_rate': 1.0},
+            {'metric_date': date(2024, 1, 15), 'mrr': 9000, 'arppm': 4500,
+             'event_revenue': 0, 'retention_rate': 0.9},
+        ])
+        
+        files = export_metrics_csv(metrics_df, str(tmp_path))
+        
+        assert [f.name for f in files] == ['daily_metrics_20240115.csv', 'daily_metrics_20240116.csv']
+        
+        exported = pd.read_csv(files[0])
+        assert list(exported.columns) == ['date', 'mrr', 'arppm', 'event_revenue', 'retention_rate']
+        assert exported.loc[0, 'date'] == '2024-01-15'
+        assert exported.loc[0, 'mrr'] == 9000
+    
+    def test_append_to_store(self, tmp_path):
+        """Test that computed KPIs are appended to the metrics store"""
+        pytest.importorskip('pyarrow')
+        from metrics_store import MetricsStore
+        
+        metrics_df = pd.DataFrame([
+            {'metric_date': date(2024, 1, 15), 'mrr': 9000, 'arppm': 4500,
+             'event_revenue': 0, 'retention_rate': 0.9},
+        ])
+        store = MetricsStore(str(tmp_path))
+        
+        assert append_to_store(metrics_df, store) == 4
+        
+        stored = store.read_range(source='kpi')
+        assert list(stored.columns) == ['metric_date', 'arppm', 'event_revenue', 'mrr', 'retention_rate']
+        assert stored.loc[0, 'mrr'] == 9000
+    
+    def test_compute_range_rejects_inverted_range(self):
+        """Test that an end date before the start date is rejected before querying"""
+        engine = KPIEngine('sqlite://')
+        
+        with pytest.raises(ValueError):
+            engine.compute_range(date(2024, 2, 1), date(2024, 1, 1))
+
+if __name__ == "__main__":
+    pytest.main([__file__])
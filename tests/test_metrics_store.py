@@ -0,0 +1,116 @@
+import pytest
+import sys
+from datetime import date
+from pathlib import Path
+import pandas as pd
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+pytest.importorskip('pyarrow')
+
+from metrics_store import MetricsStore, period_start
+
+def daily_frame(start, days, **metrics):
+    """Wide frame of consecutive days with the given metric values"""
+    frame = pd.DataFrame({'metric_date': pd.date_range(start, periods=days).date})
+    for name, values in metrics.items():
+        frame[name] = values
+    return frame
+
+class TestMetricsStore:
+    """Test cases for the columnar metrics store"""
+    
+    def test_append_partitions_by_month(self, tmp_path):
+        """Test that appends land in month partitions in long form"""
+        store = MetricsStore(str(tmp_path))
+        
+        written = store.append(daily_frame('2024-01-30', 3, mrr=[1, 2, 3], arppm=[1.0, 1.0, 1.0]), 'kpi')
+        
+        assert written == 6
+        assert store.partitions() == ['2024-01', '2024-02']
+        assert len(store.read_long(metrics=['mrr'])) == 3
+    
+    def test_read_range_latest_value_wins(self, tmp_path):
+        """Test that a recomputed day supersedes the earlier value"""
+        store = MetricsStore(str(tmp_path))
+        store.append(daily_frame('2024-01-01', 3, mrr=[1, 2, 3]), 'kpi')
+        store.append(daily_frame('2024-01-02', 1, mrr=[20]), 'kpi')
+        
+        result = store.read_range(date(2024, 1, 2), date(2024, 1, 3))
+        
+        assert list(result['metric_date']) == [date(2024, 1, 2), date(2024, 1, 3)]
+        assert list(result['mrr']) == [20, 3]
+    
+    def test_compaction_keeps_latest_values(self, tmp_path):
+        """Test that compaction merges parts without changing reads"""
+        store = MetricsStore(str(tmp_path))
+        for value in range(4):
+            store.append(daily_frame('2024-03-01', 2, mrr=[value, value]), 'kpi')
+        before = store.read_range()
+        
+        assert store.compact() == {'2024-03': 4}
+        
+        assert len(store.parts('2024-03')) == 1
+        pd.testing.assert_frame_equal(store.read_range(), before)
+    
+    def test_automatic_compaction(self, tmp_path):
+        """Test that a month is compacted once it reaches the part limit"""
+        store = MetricsStore(str(tmp_path), compact_max_parts=3)
+        for day in range(1, 4):
+            store.append(daily_frame(f'2024-03-0{day}', 1, mrr=[day]), 'kpi')
+        
+        assert len(store.parts('2024-03')) == 1
+        assert list(store.read_range()['mrr']) == [1, 2, 3]
+    
+    def test_rollup_by_week_and_month(self, tmp_path):
+        """Test sums for amounts and means for ratios"""
+        store = MetricsStore(str(tmp_path))
+        # 2024-01-29 is a Monday
+        store.append(daily_frame('2024-01-29', 7, mrr=[10] * 7, retention_rate=[0.5, 1.0] * 3 + [0.5]), 'kpi')
+        
+        weekly = store.rollup('week')
+        assert list(weekly['period']) == [pd.Timestamp('2024-01-29')]
+        assert weekly['days'].iloc[0] == 7
+        assert weekly['mrr'].iloc[0] == 70
+        assert weekly['retention_rate'].iloc[0] == pytest.approx(5.0 / 7)
+        
+        monthly = store.rollup('month', metrics=['mrr'])
+        assert list(monthly['period']) == [pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-01')]
+        assert list(monthly['mrr']) == [30, 40]
+    
+    def test_moving_average_over_calendar_days(self, tmp_path):
+        """Test that missing days shorten the window rather than stretch it"""
+        store = MetricsStore(str(tmp_path))
+        store.append(pd.DataFrame({'metric_date': [date(2024, 1, 1), date(2024, 1, 3)], 'mrr': [3, 6]}), 'kpi')
+        
+        result = store.moving_average(2)
+        
+        assert len(result) == 3
+        assert list(result['mrr_ma2']) == [3, 3, 6]
+    
+    def test_empty_store(self, tmp_path):
+        """Test reads before the first append"""
+        store = MetricsStore(str(tmp_path / 'missing'))
+        
+        assert store.read_range(metrics=['mrr']).empty
+        assert store.rollup('week').empty
+        assert store.version() == '0:0'
+    
+    def test_import_legacy_files(self, tmp_path):
+        """Test that per-day summary and KPI files are appended to the store"""
+        pd.DataFrame([{'date': '2024-01-15', 'total_tickets': 50, 'files_generated': 3}]).to_json(
+            tmp_path / 'daily_summary_20240115.json', orient='records')
+        pd.DataFrame([{'date': '2024-01-15', 'mrr': 900.0}]).to_csv(tmp_path / 'daily_metrics_20240115.csv', index=False)
+        store = MetricsStore(str(tmp_path / 'store'))
+        
+        assert store.import_files(str(tmp_path)) == {'ingestion': 1, 'kpi': 1}
+        assert list(store.read_range().columns) == ['metric_date', 'mrr', 'total_tickets']
+    
+    def test_period_start_rejects_unknown_period(self):
+        """Test that only day, week and month rollups exist"""
+        with pytest.raises(ValueError):
+            period_start(pd.Series([date(2024, 1, 1)]), 'quarter')
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,90 @@
+import pytest
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from micro_batch_ingestion import MicroBatcher, MicroBatchIngestor
+
+class FakeLoader:
+    """Records batch loads instead of talking to PostgreSQL"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def batch_load_csv_files(self, csv_paths, target_table, schema, primary_key, staging_values):
+        self.calls.append((target_table, staging_values['load_date'], list(csv_paths)))
+        return {
+            'success': True,
+            'rows_loaded': 2 * len(csv_paths),
+            'rows_per_file': {path: 2 for path in csv_paths}
+        }
+
+def write_csv(path, age_seconds=60):
+    """Write a small CSV and backdate its mtime"""
+    path.write_text("id,value\n1,a\n2,b\n")
+    old = time.time() - age_seconds
+    os.utime(path, (old, old))
+
+class TestMicroBatcher:
+    """Test cases for batch grouping"""
+    
+    def test_flush_by_count(self):
+        batcher = MicroBatcher(max_batch_files=2, max_batch_bytes=10**9, max_wait_seconds=10**6)
+        batcher.add(Path('a.csv'), 10, 0)
+        assert not batcher.should_flush(1)
+        batcher.add(Path('b.csv'), 10, 0)
+        assert batcher.should_flush(1)
+    
+    def test_flush_by_size_and_age(self):
+        batcher = MicroBatcher(max_batch_files=100, max_batch_bytes=100, max_wait_seconds=30)
+        batcher.add(Path('a.csv'), 150, 0)
+        assert batcher.should_flush(1)
+        
+        batcher.drain()
+        batcher.add(Path('b.csv'), 10, 0)
+        assert not batcher.should_flush(29)
+        assert batcher.should_flush(30)
+
+class TestMicroBatchIngestor:
+    """Test cases for file arrival handling"""
+    
+    def test_scan_skips_unknown_and_unsettled_files(self, tmp_path):
+        write_csv(tmp_path / 'tickets_20240115.csv')
+        write_csv(tmp_path / 'attendance_20240115.csv')
+        write_csv(tmp_path / 'dues_20240115.csv', age_seconds=0)
+        
+        ingestor = MicroBatchIngestor(str(tmp_path), 'sqlite://', settle_seconds=5, run_dbt=False)
+        ready = ingestor.scan()
+        
+        assert [path.name for path in ready] == ['tickets_20240115.csv']
+    
+    def test_run_once_loads_each_file_once(self, tmp_path):
+        write_csv(tmp_path / 'tickets_20240115.csv')
+        write_csv(tmp_path / 'tickets_20240116.csv')
+        write_csv(tmp_path / 'dues_20240115.csv')
+        
+        ingestor = MicroBatchIngestor(str(tmp_path), 'sqlite://', run_dbt=False)
+        ingestor._loader = FakeLoader()
+        
+        summary = ingestor.run_once()
+        assert summary['success']
+        assert summary['files'] == 3
+        assert summary['rows_loaded'] == 6
+        assert summary['changed_models'] == ['stg_cuota', 'stg_entrada']
+        assert [call[:2] for call in ingestor._loader.calls] == [
+            ('cuota', '2024-01-15'),
+            ('entrada', '2024-01-15'),
+            ('entrada', '2024-01-16'),
+        ]
+        
+        # State survives a restart and unchanged files are not reloaded
+        restarted = MicroBatchIngestor(str(tmp_path), 'sqlite://', run_dbt=False)
+        restarted._loader = FakeLoader()
+        assert restarted.run_once() is None
+
+if __name__ == "__main__":
+    pytest.main([__file__])
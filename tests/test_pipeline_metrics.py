@@ -0,0 +1,100 @@
+import pytest
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from pipeline_metrics import StageMetrics, build_report, load_dbt_run_results
+
+class TestStageMetrics:
+    """Test cases for stage spans and their sinks"""
+    
+    def test_span_records_rows_and_status(self):
+        metrics = StageMetrics(run_id='run-1')
+        
+        with metrics.span('loader.copy_csv') as span:
+            span['rows'] = 100
+        
+        with pytest.raises(RuntimeError):
+            with metrics.span('loader.upsert'):
+                raise RuntimeError("boom")
+        
+        copy_span, upsert_span = metrics.spans
+        assert copy_span['rows'] == 100
+        assert copy_span['rows_per_second'] > 0
+        assert upsert_span['status'] == 'failed'
+    
+    def test_flush_writes_table_and_prometheus_textfile(self, tmp_path):
+        db_path = str(tmp_path / 'metrics.db')
+        prom_path = tmp_path / 'club_pipeline.prom'
+        
+        metrics = StageMetrics(run_id='run-1')
+        metrics.record('ingestion.generate_tickets', 0.5, rows=50)
+        assert metrics.flush(db_path, str(prom_path)) == 1
+        assert metrics.spans == []
+        
+        prom = prom_path.read_text()
+        assert 'club_pipeline_stage_duration_seconds{stage="ingestion.generate_tickets"} 0.500000' in prom
+        assert 'club_pipeline_stage_rows{stage="ingestion.generate_tickets"} 50' in prom
+        assert 'club_pipeline_stage_rows_per_second{stage="ingestion.generate_tickets"} 100.000' in prom
+    
+    def test_report_flags_regressions(self, tmp_path):
+        db_path = str(tmp_path / 'metrics.db')
+        
+        for run, duration in enumerate([1.0, 1.1, 0.9, 3.0]):
+            metrics = StageMetrics(run_id=f'run-{run}')
+            metrics.record('dbt.run.fact_ticket_sales', duration, started_at=f'2024-01-0{run + 1}T00:00:00')
+            metrics.record('soda.scan', 2.0, started_at=f'2024-01-0{run + 1}T00:00:00')
+            metrics.flush(db_path, None)
+        
+        report = build_report(db_path, top=5, regression_ratio=1.5)
+        
+        assert [item['stage'] for item in report['slowest']] == ['dbt.run.fact_ticket_sales', 'soda.scan']
+        assert [item['stage'] for item in report['regressions']] == ['dbt.run.fact_ticket_sales']
+        assert report['regressions'][0]['baseline_seconds'] == pytest.approx(1.0)
+    
+    def test_load_dbt_run_results(self, tmp_path):
+        run_results = tmp_path / 'run_results.json'
+        run_results.write_text(json.dumps({
+            'args': {'which': 'run'},
+            'results': [{
+                'unique_id': 'model.club_analytics.fact_dues_payments',
+                'status': 'success',
+                'execution_time': 2.5,
+                'adapter_response': {'rows_affected': 30},
+                'timing': [{'name': 'execute', 'started_at': '2024-01-15T00:00:00Z'}]
+            }]
+        }))
+        
+        metrics = StageMetrics()
+        assert load_dbt_run_results(str(run_results), metrics) == 1
+        
+        span = metrics.spans[0]
+        assert span['stage'] == 'dbt.run.fact_dues_payments'
+        assert span['duration_seconds'] == 2.5
+        assert span['rows'] == 30
+        assert span['started_at'] == '2024-01-15T00:00:00.000000+00:00'
+    
+    def test_started_at_is_normalized_to_utc(self, tmp_path):
+        """Test that spans from Airflow, dbt and local clocks order as the same timeline"""
+        db_path = str(tmp_path / 'metrics.db')
+        
+        # 08:30 at UTC-3 is 11:30 UTC, after the 09:00 UTC dbt span (but not as text)
+        for run, started_at in enumerate([
+            datetime(2024, 1, 15, 6, 0, tzinfo=timezone.utc),
+            '2024-01-15T09:00:00Z',
+            '2024-01-15T08:30:00-03:00'
+        ]):
+            metrics = StageMetrics(run_id=f'run-{run}')
+            metrics.record('dbt.run.fact_ticket_sales', 1.0, started_at=started_at)
+            metrics.flush(db_path, None)
+        
+        report = build_report(db_path, top=1)
+        
+        assert report['slowest'][0]['run_id'] == 'run-2'
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,68 @@
+import pytest
+import sys
+import yaml
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from quality_checks import checks_file, scan_variables, data_source_yaml
+
+class TestScanConfiguration:
+    """Test cases for the Soda scan configuration helpers"""
+    
+    def test_scan_variables(self):
+        """Test the load window and sampling variables"""
+        variables = scan_variables('2024-01-15', '2024-01-16', sample_buckets=10)
+        
+        assert variables == {'START_DATE': '2024-01-15', 'END_DATE': '2024-01-16', 'SAMPLE_BUCKETS': '10'}
+    
+    def test_scan_variables_rejects_bad_window(self):
+        """Test that empty windows and sample sizes are rejected"""
+        with pytest.raises(ValueError):
+            scan_variables('2024-01-16', '2024-01-15')
+        with pytest.raises(ValueError):
+            scan_variables('2024-01-15', '2024-01-16', sample_buckets=0)
+    
+    def test_data_source_yaml(self):
+        """Test the data source configuration built from a connection string"""
+        config = yaml.safe_load(data_source_yaml('postgresql://user:p%40ss@db:5433/club_analytics'))
+        
+        source = config['data_source postgres_local']
+        assert source['host'] == 'db'
+        assert source['port'] == 5433
+        assert source['password'] == 'p@ss'
+        assert source['database'] == 'club_analytics'
+        assert source['schema'] == 'analytics'
+
+class TestCheckFiles:
+    """Test cases for the SodaCL check files"""
+    
+    def test_unknown_mode(self):
+        """Test that unknown scan modes are rejected"""
+        with pytest.raises(ValueError):
+            checks_file('hourly')
+    
+    def test_incremental_checks_are_filtered(self):
+        """Test that every incremental check runs on a load window partition"""
+        checks = yaml.safe_load(checks_file('incremental').read_text())
+        
+        check_sections = [key for key in checks if key.startswith('checks for')]
+        assert check_sections
+        for section in check_sections:
+            assert section.endswith('[run_window]') or section.endswith('[key_sample]')
+        for key, value in checks.items():
+            if key.startswith('filter'):
+                assert '${START_DATE}' in value['where'] and '${END_DATE}' in value['where']
+    
+    def test_full_checks_cover_all_marts(self):
+        """Test that the full scan checks every mart"""
+        checks = yaml.safe_load(checks_file('full').read_text())
+        
+        assert {
+            'checks for fact_ticket_sales', 'checks for fact_dues_payments',
+            'checks for dim_member', 'checks for dim_event'
+        } <= set(checks)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,193 @@
+import pytest
+import sys
+import time
+import threading
+import pandas as pd
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from query_service import (
+    LRUTTLCache, QueryService, QueryServiceClient, QueryServiceError,
+    cache_key, make_server, normalize_query
+)
+
+class FakeClock:
+    """Manually advanced clock for TTL tests"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+class TestCacheKey:
+    """Test cases for query normalization"""
+    
+    def test_normalize_query(self):
+        """Test that whitespace and trailing semicolons do not change the key"""
+        assert normalize_query("SELECT  a\n  FROM t ;") == "SELECT a FROM t"
+        assert cache_key("SELECT a\nFROM t", {'x': 1, 'y': 2}) == cache_key("SELECT a FROM t;", {'y': 2, 'x': 1})
+    
+    def test_version_is_part_of_the_key(self):
+        """Test that a new run version gives a new key"""
+        assert cache_key("SELECT 1", version='run_1') != cache_key("SELECT 1", version='run_2')
+
+class TestLRUTTLCache:
+    """Test cases for the bounded result cache"""
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = LRUTTLCache(max_entries=2)
+        cache.put('a', pd.DataFrame({'x': [1]}))
+        cache.put('b', pd.DataFrame({'x': [2]}))
+        cache.get('a')
+        cache.put('c', pd.DataFrame({'x': [3]}))
+        
+        assert cache.get('b') is None
+        assert cache.get('a') is not None and cache.get('c') is not None
+    
+    def test_byte_bound(self):
+        """Test that the total cached size stays under max_bytes"""
+        frame = pd.DataFrame({'x': range(1000)})
+        size = int(frame.memory_usage(index=True, deep=True).sum())
+        cache = LRUTTLCache(max_entries=100, max_bytes=size * 2)
+        for key in 'abc':
+            cache.put(key, frame)
+        
+        assert len(cache.entries) == 2
+        assert cache.total_bytes <= size * 2
+    
+    def test_ttl_expiry(self):
+        """Test that entries expire after their TTL"""
+        clock = FakeClock()
+        cache = LRUTTLCache(ttl_seconds=10, clock=clock)
+        cache.put('a', pd.DataFrame({'x': [1]}))
+        
+        clock.now = 9.9
+        assert cache.get('a') is not None
+        clock.now = 10.0
+        assert cache.get('a') is None
+        assert cache.total_bytes == 0
+
+class TestQueryService:
+    """Test cases for the in-process query service"""
+    
+    def test_cache_hits(self):
+        """Test that identical queries are served from cache"""
+        service = QueryService('sqlite://')
+        first = service.query("SELECT :x AS x", {'x': 1})
+        second = service.query("SELECT  :x AS x ;", {'x': 1})
+        
+        assert first.equals(second)
+        assert service.stats()['misses'] == 1
+        assert service.stats()['hits'] == 1
+    
+    def test_fetch_reports_source(self):
+        """Test that fetch reports where each result came from"""
+        service = QueryService('sqlite://')
+        _, first = service.fetch("SELECT 1 AS x")
+        _, second = service.fetch("SELECT 1 AS x")
+        _, uncached = service.fetch("SELECT 1 AS x", use_cache=False)
+        
+        assert first['source'] == 'database'
+        assert second['source'] == 'cache'
+        assert uncached['source'] == 'database'
+        assert first['bytes'] > 0
+    
+    def test_concurrent_requests_are_coalesced(self, monkeypatch):
+        """Test that concurrent identical queries hit the database once"""
+        service = QueryService('sqlite://')
+        calls = []
+        release = threading.Event()
+        
+        def slow_execute(query, params):
+            calls.append(query)
+            release.wait(timeout=5)
+            return pd.DataFrame({'x': [1]})
+        
+        monkeypatch.setattr(service, '_execute', slow_execute)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(service.query("SELECT 1 AS x")))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        while len(calls) == 0 or service.stats()['coalesced'] < 9:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        
+        assert len(calls) == 1
+        assert len(results) == 10
+    
+    def test_leader_exit_releases_waiters(self, monkeypatch):
+        """Test that a leader stopped by a BaseException fails its coalesced waiters"""
+        service = QueryService('sqlite://')
+        release = threading.Event()
+        
+        def stopped_execute(query, params):
+            release.wait(timeout=5)
+            raise SystemExit(1)
+        
+        monkeypatch.setattr(service, '_execute', stopped_execute)
+        errors = []
+        
+        def run():
+            try:
+                service.query("SELECT 1 AS x")
+            except SystemExit as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=run, daemon=True) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        while service.stats()['coalesced'] < 2:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        
+        assert not any(thread.is_alive() for thread in threads)
+        assert len(errors) == 3
+        assert service.in_flight == {}
+    
+    def test_query_errors_are_wrapped(self):
+        """Test that database errors surface as QueryServiceError"""
+        service = QueryService('sqlite://')
+        
+        with pytest.raises(QueryServiceError):
+            service.query("SELECT * FROM missing_table")
+
+class TestQueryServiceHTTP:
+    """Test cases for the local HTTP front end"""
+    
+    def test_round_trip(self):
+        """Test a query and stats through the HTTP service"""
+        server = make_server(QueryService('sqlite://'), port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            client = QueryServiceClient(f"http://127.0.0.1:{server.server_address[1]}")
+            result = client.query("SELECT :name AS name, NULL AS missing", {'name': 'club'})
+            client.query("SELECT :name AS name, NULL AS missing", {'name': 'club'})
+            
+            assert list(result.columns) == ['name', 'missing']
+            assert result.iloc[0]['name'] == 'club'
+            assert client.stats()['hits'] == 1
+            
+            _, info = client.fetch("SELECT :name AS name, NULL AS missing", {'name': 'club'})
+            assert info['source'] == 'cache'
+            assert info['bytes'] > 0
+            
+            with pytest.raises(QueryServiceError):
+                client.query("SELECT * FROM missing_table")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,149 @@
+import pytest
+import sys
+from datetime import date
+from pathlib import Path
+import pandas as pd
+from sqlalchemy import create_engine, event, text
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from retention import (
+    archive_raw_files, archive_raw_rows, archived_entries, cutoff_date,
+    load_manifest, restore_files, restore_rows
+)
+
+@pytest.fixture
+def engine():
+    """In-memory database with an attached 'raw' schema holding two load days (raw.entrada column types)"""
+    engine = create_engine('sqlite://')
+    
+    @event.listens_for(engine, 'connect')
+    def attach_raw(dbapi_connection, connection_record):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS raw")
+    
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE raw.entrada (identrada BIGINT PRIMARY KEY, idsocio INTEGER NOT NULL, "
+            "precio INTEGER NOT NULL, idevento INTEGER NULL, idpartido INTEGER NULL, "
+            "load_date DATE, loaded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        conn.execute(text(
+            "INSERT INTO raw.entrada VALUES "
+            "(1, 7, 1000, 3, NULL, '2024-01-01', '2024-01-01 10:00:00'), "
+            "(2, 8, 1250, NULL, 5, '2024-01-01', '2024-01-01 10:00:00'), "
+            "(3, 7, 800, 1, NULL, '2024-03-01', '2024-03-01 10:00:00'), "
+            "(4, 9, 900, NULL, NULL, NULL, '2023-12-01 10:00:00')"
+        ))
+    return engine
+
+class FakeRestoreLoader:
+    """Loader test double that reads back the CSV it is given"""
+    
+    def __init__(self):
+        self.loads = []
+    
+    def batch_load_csv(self, csv_path, target_table, schema, primary_key, update_columns=None,
+                       staging_values=None):
+        df = pd.read_csv(csv_path)
+        self.loads.append({'table': target_table, 'frame': df, 'csv': Path(csv_path).read_text(),
+                           'staging_values': staging_values})
+        return {'success': True, 'rows_loaded': len(df), 'error': None}
+
+class TestRetention:
+    """Test cases for the raw data archive"""
+    
+    def test_cutoff_date(self):
+        """Test the first kept day of the horizon"""
+        assert cutoff_date(30, date(2024, 3, 31)) == date(2024, 3, 1)
+    
+    def test_archive_rows_before_cutoff(self, engine, tmp_path):
+        """Test that old load days move to Parquet and leave the table"""
+        manifest = load_manifest(str(tmp_path))
+        entries = archive_raw_rows(engine, 'entrada', date(2024, 2, 1), str(tmp_path), manifest)
+        
+        assert [(entry['partition_date'], entry['rows']) for entry in entries] == [('2024-01-01', 2)]
+        assert entries[0]['path'] == 'raw/entrada/load_date=2024-01-01/part.parquet'
+        assert load_manifest(str(tmp_path))['entries'] == entries
+        
+        archived = pd.read_parquet(tmp_path / entries[0]['path'])
+        assert sorted(archived['identrada']) == [1, 2]
+        # Partly NULL integer columns keep an integer type
+        assert str(archived['idevento'].dtype) == 'Int64'
+        assert str(archived['idpartido'].dtype) == 'Int64'
+        
+        with engine.connect() as conn:
+            remaining = [row[0] for row in conn.execute(text("SELECT identrada FROM raw.entrada ORDER BY 1"))]
+        # Rows without a load_date (seed data) are never archived
+        assert remaining == [3, 4]
+    
+    def test_dry_run_keeps_rows(self, engine, tmp_path):
+        """Test that a dry run neither writes archives nor deletes rows"""
+        manifest = load_manifest(str(tmp_path))
+        assert archive_raw_rows(engine, 'entrada', date(2024, 2, 1), str(tmp_path), manifest, dry_run=True) == []
+        
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM raw.entrada")).scalar() == 4
+        assert not (tmp_path / 'raw').exists()
+    
+    def test_restore_rows_through_loader(self, engine, tmp_path):
+        """Test that restore feeds the archived rows of the range to the loader"""
+        archive_raw_rows(engine, 'entrada', date(2024, 2, 1), str(tmp_path), load_manifest(str(tmp_path)))
+        loader = FakeRestoreLoader()
+        
+        restored = restore_rows(loader, str(tmp_path), date(2024, 1, 1), date(2024, 1, 31), ['entrada'])
+        
+        assert restored == {'entrada': 2}
+        assert loader.loads[0]['table'] == 'entrada'
+        assert loader.loads[0]['staging_values'] == {'load_date': '2024-01-01'}
+        assert list(loader.loads[0]['frame']['precio']) == [1000, 1250]
+        
+        # Integer ids as COPY into INT columns expects them, no archived loaded_at watermark
+        header, first, second = loader.loads[0]['csv'].splitlines()
+        assert header == 'identrada,idsocio,precio,idevento,idpartido,load_date'
+        assert first.startswith('1,7,1000,3,,') and second.startswith('2,8,1250,,5,')
+        
+        assert restore_rows(loader, str(tmp_path), date(2024, 2, 1), date(2024, 2, 28), ['entrada']) == {'entrada': 0}
+    
+    def test_restore_rejects_modified_archive(self, engine, tmp_path):
+        """Test that an archive not matching its manifest checksum is not loaded"""
+        entries = archive_raw_rows(engine, 'entrada', date(2024, 2, 1), str(tmp_path), load_manifest(str(tmp_path)))
+        (tmp_path / entries[0]['path']).write_bytes(b'corrupted')
+        
+        with pytest.raises(RuntimeError, match='Checksum'):
+            restore_rows(FakeRestoreLoader(), str(tmp_path), date(2024, 1, 1), date(2024, 1, 31), ['entrada'])
+    
+    def test_archive_and_restore_files(self, tmp_path):
+        """Test that old daily CSVs round-trip through the archive unchanged"""
+        raw_dir = tmp_path / 'raw'
+        raw_dir.mkdir()
+        old_csv = "identrada,precio,estado\n2024010100001,10.50,\n2024010100002,007,pagado\n"
+        (raw_dir / 'tickets_20240101.csv').write_text(old_csv)
+        (raw_dir / 'dues_20240301.csv').write_text("idcuota\n1\n")
+        (raw_dir / 'notes.csv').write_text("a\n1\n")
+        archive_dir = str(tmp_path / 'archive')
+        
+        entries = archive_raw_files(str(raw_dir), date(2024, 2, 1), archive_dir, load_manifest(archive_dir))
+        
+        assert [(entry['dataset'], entry['source']) for entry in entries] == [('tickets', 'tickets_20240101.csv')]
+        assert sorted(path.name for path in raw_dir.iterdir()) == ['dues_20240301.csv', 'notes.csv']
+        
+        written = restore_files(archive_dir, date(2024, 1, 1), date(2024, 1, 1), str(raw_dir))
+        assert written == [raw_dir / 'tickets_20240101.csv']
+        assert written[0].read_text() == old_csv
+    
+    def test_archived_entries_filters(self):
+        """Test the manifest selection by kind, range and dataset"""
+        manifest = {'entries': [
+            {'kind': 'rows', 'dataset': 'entrada', 'partition_date': '2024-01-01'},
+            {'kind': 'rows', 'dataset': 'cuota', 'partition_date': '2024-01-02'},
+            {'kind': 'file', 'dataset': 'tickets', 'partition_date': '2024-01-01'},
+            {'kind': 'rows', 'dataset': 'entrada', 'partition_date': '2024-02-01'},
+        ]}
+        
+        selected = archived_entries(manifest, 'rows', date(2024, 1, 1), date(2024, 1, 31), ['entrada'])
+        assert selected == [manifest['entries'][0]]
+        assert len(archived_entries(manifest, 'rows', date(2024, 1, 1), date(2024, 12, 31))) == 3
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,55 @@
+import pytest
+import sys
+from pathlib import Path
+from sqlalchemy import create_engine, event
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from run_marker import datasets_for_models, publish_run_marker, read_run_versions, dataset_version
+
+@pytest.fixture
+def engine():
+    """In-memory database with an attached 'analytics' schema"""
+    engine = create_engine('sqlite://')
+    
+    @event.listens_for(engine, 'connect')
+    def attach_analytics(dbapi_connection, connection_record):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS analytics")
+    
+    return engine
+
+class TestRunMarker:
+    """Test cases for pipeline run markers"""
+    
+    def test_datasets_for_models(self):
+        """Test the mapping from rebuilt models to dashboard datasets"""
+        assert datasets_for_models(['stg_cuota']) == ['daily_metrics', 'dues_payments', 'member_cohorts']
+        assert datasets_for_models(['stg_entrada'], include_always=False) == ['member_cohorts', 'ticket_sales']
+        assert datasets_for_models([], include_always=False) == []
+    
+    def test_read_before_first_publish(self, engine):
+        """Test that a missing marker table reads as no versions"""
+        assert read_run_versions(engine) == {}
+    
+    def test_publish_only_touches_given_datasets(self, engine):
+        """Test that a run moves the version of its own datasets only"""
+        publish_run_marker(engine, 'run_1', ['ticket_sales', 'dues_payments'])
+        before = read_run_versions(engine)
+        
+        publish_run_marker(engine, 'run_2', ['dues_payments'])
+        after = read_run_versions(engine)
+        
+        assert after['ticket_sales'] == before['ticket_sales']
+        assert after['dues_payments'] != before['dues_payments']
+        assert after['dues_payments'].startswith('run_2@')
+    
+    def test_dataset_version(self):
+        """Test the combined version of several datasets"""
+        versions = {'members': 'a', 'ticket_sales': 'b'}
+        
+        assert dataset_version(versions, 'ticket_sales', 'members') == 'a|b'
+        assert dataset_version(versions, 'events') == ''
+
+if __name__ == "__main__":
+    pytest.main([__file__])
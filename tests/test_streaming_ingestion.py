@@ -0,0 +1,163 @@
+import pytest
+import sys
+import pandas as pd
+from io import StringIO
+from datetime import datetime
+from pathlib import Path
+
+# Add the scripts directory to the path
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+
+from data_ingestion import generate_ticket_data, generate_chunks
+from streaming_ingestion import StreamPipe, csv_chunks, stream_generated_load
+
+class FakeStreamLoader:
+    """Stands in for IdempotentBatchLoader: reads the stream like COPY does"""
+    
+    def __init__(self, read_size=8192):
+        self.read_size = read_size
+        self.data = b''
+        self.calls = []
+    
+    def batch_load_stream(self, stream, columns, target_table, schema, primary_key, staging_values=None):
+        while True:
+            chunk = stream.read(self.read_size)
+            if not chunk:
+                break
+            self.data += chunk
+        self.calls.append((columns, target_table, schema, primary_key, staging_values))
+        rows = len(pd.read_csv(StringIO(self.data.decode('utf-8'))))
+        return {'success': True, 'rows_loaded': rows}
+
+class TestStreamPipe:
+    """Test cases for the in-memory pipe between generator and COPY"""
+    
+    def test_reads_all_bytes_in_order(self):
+        """Test that arbitrary read sizes return the chunks in order"""
+        chunks = [b'header\n', b'1,a\n', b'2,b\n', b'3,c\n']
+        with StreamPipe(iter(chunks), max_chunks=2) as pipe:
+            data = b''
+            while True:
+                piece = pipe.read(3)
+                if not piece:
+                    break
+                data += piece
+        
+        assert data == b''.join(chunks)
+        assert pipe.bytes_produced == len(data)
+    
+    def test_backpressure(self):
+        """Test that the producer stops when the pipe is full"""
+        produced = []
+        
+        def chunks():
+            for i in range(10):
+                produced.append(i)
+                yield b'x' * 10
+        
+        with StreamPipe(chunks(), max_chunks=2) as pipe:
+            assert pipe.stalled.wait(timeout=5)
+            # two chunks queued plus one the producer is blocked on
+            assert len(produced) == 3
+            assert pipe.stalls == 1
+            assert len(pipe.read()) == 100
+    
+    def test_producer_error_reaches_reader(self):
+        """Test that a failing generator fails the COPY read"""
+        def chunks():
+            yield b'header\n'
+            raise RuntimeError("generator failed")
+        
+        with StreamPipe(chunks()) as pipe:
+            with pytest.raises(RuntimeError, match="generator failed"):
+                pipe.read()
+    
+    def test_producer_exit_reaches_reader(self):
+        """Test that a generator raising SystemExit still ends the stream (no blocked reader)"""
+        def chunks():
+            yield b'header\n'
+            raise SystemExit(1)
+        
+        with StreamPipe(chunks()) as pipe:
+            with pytest.raises(SystemExit):
+                pipe.read()
+    
+    def test_close_stops_producer(self):
+        """Test that closing the pipe (e.g. COPY failed) releases a blocked producer"""
+        def endless():
+            while True:
+                yield b'x'
+        
+        pipe = StreamPipe(endless(), max_chunks=1)
+        pipe.read(1)
+        pipe.close()
+        
+        assert not pipe.thread.is_alive()
+
+class TestStreamingLoad:
+    """Test cases for generator -> CSV stream -> loader"""
+    
+    def test_csv_chunks_match_single_file(self, tmp_path):
+        """Test that the chunked stream and its side output equal a one-shot to_csv"""
+        run_date = datetime(2024, 1, 15)
+        side_output = tmp_path / 'tickets_20240115.csv'
+        frames = list(generate_chunks(generate_ticket_data, run_date, 25, chunk_size=10))
+        
+        streamed = b''.join(csv_chunks(frames, str(side_output)))
+        
+        expected = pd.concat(frames, ignore_index=True).to_csv(index=False).encode('utf-8')
+        assert streamed == expected
+        assert side_output.read_bytes() == expected
+    
+    def test_side_output_dropped_on_close(self, tmp_path):
+        """Test that a stream closed early leaves neither a partial file nor its temp file"""
+        side_output = tmp_path / 'tickets_20240115.csv'
+        frames = generate_chunks(generate_ticket_data, datetime(2024, 1, 15), 25, chunk_size=10)
+        chunks = csv_chunks(frames, str(side_output))
+        
+        next(chunks)
+        assert not side_output.exists()
+        chunks.close()
+        
+        assert list(tmp_path.iterdir()) == []
+    
+    def test_side_output_dropped_on_producer_error(self, tmp_path):
+        """Test that a failing generator leaves no side output behind"""
+        side_output = tmp_path / 'tickets_20240115.csv'
+        
+        def frames():
+            yield generate_ticket_data(datetime(2024, 1, 15), 5)
+            raise RuntimeError('generator failed')
+        
+        with StreamPipe(csv_chunks(frames(), str(side_output))) as pipe:
+            with pytest.raises(RuntimeError):
+                pipe.read()
+        
+        assert list(tmp_path.iterdir()) == []
+    
+    def test_chunk_ids_are_unique(self):
+        """Test that chunked generation continues the id sequence"""
+        frames = list(generate_chunks(generate_ticket_data, datetime(2024, 1, 15), 25, chunk_size=10))
+        ids = pd.concat(frames)['identrada']
+        
+        assert [len(frame) for frame in frames] == [10, 10, 5]
+        assert ids.is_unique
+    
+    def test_stream_generated_load(self, tmp_path):
+        """Test a streamed load with the CSV side output"""
+        loader = FakeStreamLoader(read_size=1000)
+        result = stream_generated_load(
+            loader, 'tickets', datetime(2024, 1, 15), 120, chunk_size=25, max_chunks=1,
+            side_output_dir=str(tmp_path)
+        )
+        
+        assert result['rows_loaded'] == 120
+        assert result['bytes_streamed'] == len(loader.data)
+        assert (tmp_path / 'tickets_20240115.csv').read_bytes() == loader.data
+        columns, target_table, schema, primary_key, staging_values = loader.calls[0]
+        assert (target_table, schema, primary_key) == ('entrada', 'raw', 'identrada')
+        assert staging_values == {'load_date': '2024-01-15'}
+        assert columns[0] == 'identrada'
+
+if __name__ == "__main__":
+    pytest.main([__file__])